@@ -1,13 +1,16 @@
 @echo off
 TITLE XAUUSD PRO SYSTEM - STARTUP
-echo [1/3] Starting Web Dashboard...
+echo [1/4] Starting Web Dashboard...
 start cmd /k "cd web-dashboard && npm run dev"
 
-echo [2/3] Waiting for server to initialize...
+echo [2/4] Waiting for server to initialize...
 timeout /t 5
 
-echo [3/3] Starting MT5 Python Bridge...
-start cmd /k "cd web-dashboard && python bridge.py"
+echo [3/4] Starting MT5 Python Bridge...
+start cmd /k "cd web-dashboard && python bridge.py --stream --poll-interval 0.25"
+
+echo [4/4] Starting Backtest Service...
+start cmd /k "cd web-dashboard && python backtest_server.py"
 
 echo.
 echo ======================================================
@@ -1,4 +1,7 @@
-import MetaTrader5 as mt5
+try:
+    import MetaTrader5 as mt5
+except ImportError: # No terminal (e.g. Linux): train from the bar cache
+    mt5 = None
 import pandas as pd
 import numpy as np
 import joblib
@@ -6,15 +9,50 @@ import os
 import json
 import logging
 import sys
-from datetime import datetime
+import argparse
+from datetime import datetime, timezone
 from xgboost import XGBClassifier
+from features import PIPELINE, FeatureStore
+from data_provider import BarProvider
+from model_registry import ModelRegistry
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', handlers=[logging.StreamHandler(sys.stdout)])
 logger = logging.getLogger(__name__)
 
 SYMBOL = "XAUUSD"
-MODEL_PATH = "trading_model.pkl"
+MODEL_PATH = "trading_model.pkl" # Legacy joblib pickle, read only when the registry is empty
+MODEL_CONFIG_PATH = "model_config.json" # Winning hyperparameters from model_search.py (override XGB_PARAMS)
+TRAINING_TIMEFRAME = "M5"
+TRAINING_BARS = 10000 # Training window (bars)
+
+# Target: 1 Long / 2 Short when the close LOOK_AHEAD bars later moved more than PIP_THRESHOLD, else 0 Neutral
+LOOK_AHEAD = 5
+PIP_THRESHOLD = 0.30 # 300 pips for XAUUSD (approx)
+
+XGB_PARAMS = dict(
+    n_estimators=100,
+    max_depth=5,
+    learning_rate=0.1,
+    objective='multi:softprob',
+    num_class=3,
+    random_state=42
+)
+INCREMENTAL_ROUNDS = 10 # Trees added per incremental run (boosting continued on the sliding window)
+MAX_ROUNDS = 300 # An incremental run past this many trees refits the window instead
+
+def xgb_params():
+    """XGB_PARAMS updated with the last model_search.py winner, if any"""
+    params = dict(XGB_PARAMS)
+    try:
+        if os.path.exists(MODEL_CONFIG_PATH):
+            with open(MODEL_CONFIG_PATH) as f:
+                params.update(json.load(f)["params"])
+    except Exception as e:
+        logger.warning(f"Ignoring {MODEL_CONFIG_PATH}: {e}")
+    return params
+
+FEATURE_COLS = PIPELINE.columns # Declared in features.py, shared with the live bridge
 
 def load_mt5_config():
     try:
@@ -26,6 +64,8 @@ def load_mt5_config():
     return None
 
 def connect_mt5():
+    if mt5 is None:
+        return False
     config = load_mt5_config()
     if config and config.get('login'):
         logger.info(f"Connecting to MT5 for Data Collection [Account {config['login']}]...")
@@ -36,121 +76,198 @@ def connect_mt5():
         )
     return mt5.initialize()
 
-def get_training_data(timeframe=mt5.TIMEFRAME_M5, count=5000):
+def get_training_data(timeframe="M5", count=5000, online=True):
     logger.info(f"Fetching {count} bars for {SYMBOL}...")
-    rates = mt5.copy_rates_from_pos(SYMBOL, timeframe, 0, count)
+    rates = BarProvider(online=online).get_last_bars(SYMBOL, timeframe, count)
     if rates is None:
-        logger.error(f"Failed to copy rates: {mt5.last_error()}")
+        logger.error(f"Failed to load rates (MT5: {mt5.last_error() if online else 'offline'})")
         return None
     
     df = pd.DataFrame(rates)
     df['time'] = pd.to_datetime(df['time'], unit='s')
     return df
 
-def calc_ema(series, span):
-    return series.ewm(span=span, adjust=False).mean()
-
-def calc_rsi(series, period=14):
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
-
-def calc_atr(df, period=14):
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift())
-    low_close = np.abs(df['low'] - df['close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    return true_range.rolling(window=period).mean()
-
-def prepare_features(df):
+def prepare_features(df, symbol=None, timeframe=None):
+    """Batch run of the feature pipeline over a rates DataFrame, with targets; drops the unlabeled/warm-up rows"""
     logger.info("Calculating technical indicators...")
-    # EMAs
-    df['EMA_20'] = calc_ema(df['close'], 20)
-    df['EMA_50'] = calc_ema(df['close'], 50)
-    df['EMA_200'] = calc_ema(df['close'], 200)
-    
-    # RSI
-    df['RSI_14'] = calc_rsi(df['close'], 14)
-    
-    # ATR
-    df['ATR_14'] = calc_atr(df, 14)
-    
-    # VWAP (Approximate intraday)
-    df['typical_price'] = (df['high'] + df['low'] + df['close']) / 3
-    df['vwap'] = (df['typical_price'] * df['tick_volume']).cumsum() / df['tick_volume'].cumsum()
-    df['vwap_dist'] = (df['close'] - df['vwap']) / df['vwap'] * 100
-    
-    # Time Features
-    df['hour'] = df['time'].dt.hour
-    
-    # Target Generation (Look ahead 5 bars)
-    # 1: Long (Price +300 pips), 2: Short (Price -300 pips), 0: Neutral
-    look_ahead = 5
-    pip_threshold = 0.30 # 300 pips for XAUUSD (approx)
-    
-    df['future_close'] = df['close'].shift(-look_ahead)
-    df['diff'] = df['future_close'] - df['close']
-    
-    df['target'] = 0
-    df.loc[df['diff'] > pip_threshold, 'target'] = 1
-    df.loc[df['diff'] < -pip_threshold, 'target'] = 2
-    
+    # EMA/RSI/ATR kernels are memoized per (symbol, timeframe, last bar) when both are given
+    X = PIPELINE.batch(df, symbol=symbol, timeframe=timeframe)
+    for i, col in enumerate(FEATURE_COLS):
+        df[col] = X[:, i]
+
+    # Target: 1 Long / 2 Short / 0 Neutral, LOOK_AHEAD bars ahead
+    df['target'] = make_targets(df['close'].to_numpy(dtype=np.float64))
+
     # Cleanup
-    df.dropna(inplace=True)
-    
-    feature_cols = [
-        'EMA_20', 'EMA_50', 'EMA_200', 'RSI_14', 'ATR_14', 
-        'vwap_dist', 'hour', 'close'
-    ]
-    
+    df.drop(df.index[(df['target'] < 0).to_numpy() | np.isnan(X).any(axis=1)], inplace=True)
+
+    feature_cols = list(FEATURE_COLS)
+
     X = df[feature_cols]
     y = df['target']
-    
+
     return X, y, feature_cols
 
+def make_targets(close):
+    """prepare_features' target for each bar (-1 for the last LOOK_AHEAD bars, which have no label yet)"""
+    y = np.full(len(close), -1, dtype=np.int64)
+    diff = close[LOOK_AHEAD:] - close[:-LOOK_AHEAD] if len(close) > LOOK_AHEAD else np.empty(0)
+    y[:len(diff)] = np.where(diff > PIP_THRESHOLD, 1, np.where(diff < -PIP_THRESHOLD, 2, 0))
+    return y
+
+def stored_window(provider, timeframe=TRAINING_TIMEFRAME, bars=TRAINING_BARS, rebuild=False):
+    """Syncs the feature store and returns (X, y, times, added) for the labeled rows among its last `bars` bars.
+
+    New closed bars are appended incrementally (rebuild, or a store shorter
+    than `bars`, recomputes it in batch). None when no bars could be loaded.
+    """
+    store = FeatureStore()
+    added = store.sync(SYMBOL, timeframe, provider, bars, rebuild=rebuild)
+    if added is None:
+        return None
+    times, X = store.read(SYMBOL, timeframe, last=bars)
+    y = make_targets(X[:, FEATURE_COLS.index('close')])
+    rows = (y >= 0) & ~np.isnan(X).any(axis=1)
+    return X[rows], y[rows], np.asarray(times)[rows], added
+
+def _utc(ts):
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).isoformat()
+
+def classification_metrics(y, proba):
+    """Multi-class log loss, accuracy, and how often a predicted Long/Short was right"""
+    y = np.asarray(y)
+    proba = np.clip(proba, 1e-15, 1.0)
+    pred = proba.argmax(axis=1)
+    signals = pred != 0
+    return {
+        "logloss": float(-np.mean(np.log(proba[np.arange(len(y)), y]))),
+        "accuracy": float(np.mean(pred == y)),
+        "signal_precision": float(np.mean(pred[signals] == y[signals])) if signals.any() else 0.0,
+        "signal_rate": float(np.mean(signals)),
+    }
+
+def save_model(model, features, times, mode, X, y):
+    """Publishes the model to the registry with its training range, metrics and how it was trained"""
+    metrics = {"train": classification_metrics(y, model.predict_proba(X))}
+    if os.path.exists(MODEL_CONFIG_PATH):
+        with open(MODEL_CONFIG_PATH) as f:
+            metrics["cv"] = json.load(f).get("cv")
+    manifest = {
+        'symbol': SYMBOL,
+        'timeframe': TRAINING_TIMEFRAME,
+        'features': list(features),
+        'pipeline': PIPELINE.signature, # Feature definitions the booster was fit on
+        'timestamp': datetime.now().isoformat(),
+        'data_range': {"start": _utc(times[0]), "end": _utc(times[-1]), "samples": int(len(times))},
+        'mode': mode,
+        'rounds': model.get_booster().num_boosted_rounds(),
+        'params': {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str)) and v == v}, # Set, non-NaN values
+        'metrics': metrics,
+    }
+    version = ModelRegistry().publish(model.get_booster(), manifest)
+    logger.info(f"Model {version} published ({mode}, {manifest['rounds']} trees, bars {manifest['data_range']['start']} -> {manifest['data_range']['end']}, "
+                f"train logloss {metrics['train']['logloss']:.4f})")
+
+def load_model():
+    """The current registry manifest plus its 'booster', falling back to the legacy MODEL_PATH pickle; None without a model"""
+    try:
+        booster, manifest = ModelRegistry().load()
+        if booster is not None:
+            return dict(manifest, booster=booster)
+        if os.path.exists(MODEL_PATH):
+            data = joblib.load(MODEL_PATH)
+            return {'features': data['features'], 'timestamp': data.get('timestamp'), 'booster': data['model'].get_booster()}
+    except Exception as e:
+        logger.warning(f"Could not load the current model: {e}")
+    return None
+
 def train_model():
-    if not connect_mt5():
-        logger.error("MT5 not connected")
-        return False
+    """Full retrain: recomputes the stored features in batch from the last TRAINING_BARS bars and fits from scratch"""
+    online = connect_mt5()
+    if not online:
+        logger.warning("MT5 not connected, training from cached bars")
     
     try:
         # Use M5 for more stable training patterns
-        df = get_training_data(timeframe=mt5.TIMEFRAME_M5, count=10000)
-        if df is None: return False
-        
-        X, y, features = prepare_features(df)
+        logger.info(f"Computing features for the last {TRAINING_BARS} {TRAINING_TIMEFRAME} bars...")
+        window = stored_window(BarProvider(online=online), rebuild=True)
+        if window is None:
+            logger.error(f"Failed to load rates (MT5: {mt5.last_error() if online else 'offline'})")
+            return False
+        X, y, times, _ = window
+        X = pd.DataFrame(X, columns=FEATURE_COLS)
         
         logger.info(f"Training XGBoost Model on {len(X)} samples...")
-        model = XGBClassifier(
-            n_estimators=100,
-            max_depth=5,
-            learning_rate=0.1,
-            objective='multi:softprob',
-            num_class=3,
-            random_state=42
-        )
+        model = XGBClassifier(**xgb_params())
         
         model.fit(X, y)
         
         # Save model and feature names
-        model_data = {
-            'model': model,
-            'features': features,
-            'timestamp': datetime.now().isoformat()
-        }
-        joblib.dump(model_data, MODEL_PATH)
-        
-        logger.info(f"Model saved to {MODEL_PATH}")
+        save_model(model, list(FEATURE_COLS), times, "full", X, y)
         return True
         
     except Exception as e:
         logger.error(f"Training Error: {e}")
         return False
     finally:
-        mt5.shutdown()
+        if online:
+            mt5.shutdown()
+
+def train_incremental(refit=False):
+    """Retrains on the bars that arrived since the last run.
+
+    Only the new bars get feature rows (appended to the feature store in
+    incremental mode). The previous booster then gets INCREMENTAL_ROUNDS more
+    trees fit on the sliding window; with refit, without a previous model of
+    this pipeline or past MAX_ROUNDS trees the window is refit from scratch
+    (features are still not recomputed).
+    """
+    online = connect_mt5()
+    if not online:
+        logger.warning("MT5 not connected, training from cached bars")
+
+    try:
+        window = stored_window(BarProvider(online=online))
+        if window is None:
+            logger.error(f"Failed to load rates (MT5: {mt5.last_error() if online else 'offline'})")
+            return False
+
+        X, y, times, added = window
+        previous = load_model()
+        if added == 0 and previous is not None and not refit:
+            logger.info(f"No new bars since {_utc(times[-1])}: model is up to date.")
+            return True
+
+        X = pd.DataFrame(X, columns=FEATURE_COLS) # Same feature names as the boosters fit on prepare_features
+        rounds = previous['booster'].num_boosted_rounds() if previous is not None and previous.get('pipeline') == PIPELINE.signature else None
+        if refit or rounds is None or rounds + INCREMENTAL_ROUNDS > MAX_ROUNDS:
+            logger.info(f"Refitting on {len(X)} samples ({added} new bars)...")
+            model = XGBClassifier(**xgb_params())
+            model.fit(X, y)
+            mode = "refit"
+        else:
+            logger.info(f"Boosting {INCREMENTAL_ROUNDS} more trees on {len(X)} samples ({added} new bars)...")
+            model = XGBClassifier(**{**xgb_params(), "n_estimators": INCREMENTAL_ROUNDS})
+            model.fit(X, y, xgb_model=previous['booster'])
+            mode = "incremental"
+
+        save_model(model, list(FEATURE_COLS), times, mode, X, y)
+        return True
+
+    except Exception as e:
+        logger.error(f"Training Error: {e}")
+        return False
+    finally:
+        if online:
+            mt5.shutdown()
 
 if __name__ == "__main__":
-    train_model()
+    parser = argparse.ArgumentParser(description="Train the XGBoost signal model")
+    parser.add_argument("--incremental", action="store_true",
+                        help="append only the bars since the last run and keep boosting the previous model")
+    parser.add_argument("--refit", action="store_true",
+                        help="with --incremental: refit the sliding window from scratch (reusing the stored features)")
+    args = parser.parse_args()
+
+    ok = train_incremental(refit=args.refit) if args.incremental else train_model()
+    sys.exit(0 if ok else 1)
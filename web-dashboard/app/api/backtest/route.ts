@@ -1,17 +1,68 @@
 import { NextResponse } from 'next/server';
-import { exec } from 'child_process';
+import { exec, spawn } from 'child_process';
 import path from 'path';
 
+// Long-lived Python backtest service (backtest_server.py); falls back to a one-off process when it is not running
+const BACKTEST_SERVICE = `http://127.0.0.1:${process.env.BACKTEST_PORT || 8765}/backtest`;
+
+// format: 'full' (default) | 'compact' (columnar trades, epoch times) | 'summary' (aggregates only) | 'ndjson' (streamed pages)
+async function callService(body: object) {
+    try {
+        return await fetch(BACKTEST_SERVICE, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body),
+        });
+    } catch {
+        return null;
+    }
+}
+
+function ndjsonResponse(body: ReadableStream, status = 200) {
+    return new Response(body, { status, headers: { 'Content-Type': 'application/x-ndjson' } });
+}
+
 export async function POST(request: Request) {
-    const { symbol, startDate, endDate, timeframe } = await request.json();
+    const { symbol, startDate, endDate, timeframe, params, format, pageSize } = await request.json();
+    const output = format || 'full';
+
+    const served = await callService({ symbol, startDate, endDate, timeframe: timeframe || 'M15', params, format: output, pageSize });
+    if (served) {
+        if (output === 'ndjson' && served.body) {
+            return ndjsonResponse(served.body, served.status);
+        }
+        const data = await served.json();
+        if (!served.ok) {
+            return NextResponse.json({ success: false, error: data.error }, { status: served.status });
+        }
+        return NextResponse.json({ success: true, data });
+    }
+
+    const pythonScript = path.join(process.cwd(), 'backtest_engine.py');
+    const args = [pythonScript, symbol, startDate, endDate, timeframe || 'M15', '--format', output];
+    if (pageSize) args.push('--page-size', String(pageSize));
+
+    if (output === 'ndjson') {
+        // Pipe the engine's stdout straight through so pages reach the client as they are written
+        const child = spawn('python', args);
+        return ndjsonResponse(new ReadableStream({
+            start(controller) {
+                child.stdout.on('data', (chunk) => controller.enqueue(chunk));
+                child.stdout.on('end', () => controller.close());
+                child.on('error', (err) => controller.error(err));
+            },
+            cancel() {
+                child.kill();
+            }
+        }));
+    }
 
     return new Promise((resolve) => {
-        const pythonScript = path.join(process.cwd(), 'backtest_engine.py');
         console.log('Starting Backtest:', pythonScript);
 
-        const command = `python "${pythonScript}" "${symbol}" "${startDate}" "${endDate}" "${timeframe || 'M15'}"`;
+        const command = args.map((a) => `"${a}"`).join(' ');
 
-        exec(command, (error, stdout, stderr) => {
+        exec(`python ${command}`, { maxBuffer: 256 * 1024 * 1024 }, (error, stdout, stderr) => {
             if (error) {
                 console.error(`Backtest error: ${error}`);
                 resolve(NextResponse.json({
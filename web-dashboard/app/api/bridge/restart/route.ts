@@ -8,7 +8,7 @@ export async function POST() {
         console.log('Watchdog: Triggering Bridge Restart...');
 
         // Kill any existing bridge and start a new one
-        const command = `taskkill /F /IM python.exe /T & start python "${bridgeScript}"`;
+        const command = `taskkill /F /IM python.exe /T & start python "${bridgeScript}" --stream --poll-interval 0.25`;
 
         exec(command, (error, stdout, stderr) => {
             // We ignore errors from taskkill if no process was found
@@ -1,8 +1,49 @@
 import { NextResponse } from 'next/server';
 import { exec } from 'child_process';
+import { promises as fs } from 'fs';
 import path from 'path';
 
+// news_engine.py keeps the weekly calendar in data_cache/news/calendar.json (the bridge
+// refreshes it in the background). Fresh copies are served straight from disk; Python
+// is only spawned to refresh a missing or stale cache.
+const CACHE_PATH = path.join(process.cwd(), 'data_cache', 'news', 'calendar.json');
+const MAX_AGE_MS = 3600 * 1000;
+
+let memo: { mtimeMs: number; day: string; news: any[] } | null = null;
+
+function localDay(d: Date) {
+    const pad = (n: number) => String(n).padStart(2, '0');
+    return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`;
+}
+
+async function cachedNews() {
+    const stat = await fs.stat(CACHE_PATH).catch(() => null);
+    if (!stat) return null;
+
+    const cache = JSON.parse(await fs.readFile(CACHE_PATH, 'utf8'));
+    if (!cache.fetched_at || Date.now() - cache.fetched_at * 1000 > MAX_AGE_MS) return null;
+
+    const day = localDay(new Date());
+    if (memo && memo.mtimeMs === stat.mtimeMs && memo.day === day) return memo.news;
+
+    // Same filter as NewsCalendar.today(): USD/All, High/Medium, event date (feed offset) == local date
+    const news = (cache.events || [])
+        .filter((item: any) => ['USD', 'All'].includes(item.country) && ['High', 'Medium'].includes(item.impact))
+        .filter((item: any) => String(item.date).slice(0, 10) === day)
+        .sort((a: any, b: any) => Date.parse(a.date) - Date.parse(b.date))
+        .map((item: any) => ({ title: item.title, impact: item.impact, time: item.date }));
+    memo = { mtimeMs: stat.mtimeMs, day, news };
+    return news;
+}
+
 export async function GET() {
+    try {
+        const news = await cachedNews();
+        if (news) return NextResponse.json({ success: true, news });
+    } catch (e) {
+        console.error('News cache read failed:', e);
+    }
+
     return new Promise((resolve) => {
         const pythonScript = path.join(process.cwd(), 'news_engine.py');
 
@@ -3,25 +3,33 @@ import db, { initDB } from '@/lib/db';
 
 initDB();
 
+const DEFAULT_SYMBOL = 'XAUUSD';
+
 export async function POST(request: Request) {
     try {
-        const { candles, timeframe } = await request.json();
-
-        if (Array.isArray(candles) && timeframe) {
-            const stmt = db.prepare(`
-                INSERT OR REPLACE INTO candles (time, timeframe, open, high, low, close, volume)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            `);
-
-            const insertMany = db.transaction((data) => {
-                for (const c of data) {
-                    stmt.run(Number(c.time), timeframe, Number(c.open), Number(c.high), Number(c.low), Number(c.close), Number(c.volume || 0));
+        const body = await request.json();
+        // The bridge sends every symbol/timeframe delta of a cycle as {batches: [{symbol, timeframe, candles}]}
+        const batches = Array.isArray(body.batches) ? body.batches : [body];
+
+        const stmt = db.prepare(`
+            INSERT OR REPLACE INTO candles (symbol, time, timeframe, open, high, low, close, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        `);
+
+        const insertMany = db.transaction((data: any[]) => {
+            let count = 0;
+            for (const { candles, timeframe, symbol } of data) {
+                if (!Array.isArray(candles) || !timeframe) continue;
+                for (const c of candles) {
+                    stmt.run(symbol || DEFAULT_SYMBOL, Number(c.time), timeframe, Number(c.open), Number(c.high), Number(c.low), Number(c.close), Number(c.volume || 0));
                 }
-            });
+                count += candles.length;
+            }
+            return count;
+        });
 
-            insertMany(candles);
-            console.log(`Persisted ${candles.length} [${timeframe}] candles to SQLite.`);
-        }
+        const count = insertMany(batches);
+        console.log(`Persisted ${count} candles (${batches.length} symbol/timeframe batches) to SQLite.`);
 
         return NextResponse.json({ success: true });
     } catch (error) {
@@ -34,10 +42,11 @@ export async function GET(request: Request) {
     try {
         const { searchParams } = new URL(request.url);
         const tf = searchParams.get('tf') || 'M15';
+        const symbol = searchParams.get('symbol') || DEFAULT_SYMBOL;
 
-        const stmt = db.prepare('SELECT * FROM candles WHERE timeframe = ? ORDER BY time ASC');
-        const rows = stmt.all(tf);
-        console.log(`History GET [${tf}]: Returning ${rows.length} candles`);
+        const stmt = db.prepare('SELECT * FROM candles WHERE symbol = ? AND timeframe = ? ORDER BY time ASC');
+        const rows = stmt.all(symbol, tf);
+        console.log(`History GET ${symbol} [${tf}]: Returning ${rows.length} candles`);
         return NextResponse.json(rows);
     } catch (error) {
         console.error('History GET Error:', error);
@@ -1,24 +1,35 @@
 import { NextResponse } from 'next/server';
 
 // For ticks, we use a global variable (since we don't necessarily need to persist every single tick to DB for the dashboard stats)
-// But we keep it simple for now. 
-let latestTick = {
-  symbol: 'XAUUSD',
-  bid: 0,
-  ask: 0,
-  equity: 0,
-  profit: 0,
-  timestamp: Date.now(),
-};
+// Latest tick per symbol: the bridge POSTs one batch {ticks: [...]} per cycle (a single tick object is still accepted)
+const DEFAULT_SYMBOL = 'XAUUSD';
+
+const latestTicks: Record<string, any> = {};
+
+function emptyTick(symbol: string) {
+  return {
+    symbol,
+    bid: 0,
+    ask: 0,
+    equity: 0,
+    profit: 0,
+    timestamp: Date.now(),
+  };
+}
 
 export async function POST(request: Request) {
   try {
     const data = await request.json();
+    const ticks = Array.isArray(data.ticks) ? data.ticks : [data];
 
-    latestTick = {
-      ...data,
-      timestamp: Date.now(),
-    };
+    for (const tick of ticks) {
+      const symbol = tick.symbol || DEFAULT_SYMBOL;
+      latestTicks[symbol] = {
+        ...tick,
+        symbol,
+        timestamp: Date.now(),
+      };
+    }
 
     return NextResponse.json({ success: true });
   } catch (error) {
@@ -26,6 +37,8 @@ export async function POST(request: Request) {
   }
 }
 
-export async function GET() {
-  return NextResponse.json(latestTick);
+export async function GET(request: Request) {
+  const { searchParams } = new URL(request.url);
+  const symbol = searchParams.get('symbol') || DEFAULT_SYMBOL;
+  return NextResponse.json(latestTicks[symbol] ?? emptyTick(symbol));
 }
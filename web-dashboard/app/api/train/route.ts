@@ -1,13 +1,25 @@
 import { NextResponse } from 'next/server';
 import { exec } from 'child_process';
+import { promises as fs } from 'fs';
 import path from 'path';
 
-export async function POST() {
+// mode: 'incremental' (default: only bars since the last run, previous model keeps boosting),
+// 'refit' (sliding window refit on the stored features) or 'full' (fetch and fit from scratch)
+const MODE_ARGS: Record<string, string> = {
+    incremental: '--incremental',
+    refit: '--incremental --refit',
+    full: '',
+};
+
+export async function POST(request: Request) {
+    const body = await request.json().catch(() => ({}));
+    const mode = body.mode in MODE_ARGS ? body.mode : 'incremental';
+
     return new Promise((resolve) => {
         const pythonScript = path.join(process.cwd(), 'ai_engine.py');
-        console.log('Starting AI Training:', pythonScript);
+        console.log(`Starting AI Training (${mode}):`, pythonScript);
 
-        exec(`python "${pythonScript}"`, (error, stdout, stderr) => {
+        exec(`python "${pythonScript}" ${MODE_ARGS[mode]}`, async (error, stdout, stderr) => {
             if (error) {
                 console.error(`Exec error: ${error}`);
                 resolve(NextResponse.json({
@@ -19,9 +31,13 @@ export async function POST() {
             }
 
             console.log(`Training output: ${stdout}`);
+            // Manifest of the version training published (the bridge hot-reloads it)
+            const model = await fs.readFile(path.join(process.cwd(), 'models', 'current.json'), 'utf8')
+                .then(JSON.parse).catch(() => null);
             resolve(NextResponse.json({
                 success: true,
-                output: stdout
+                output: stdout,
+                model
             }));
         });
     });
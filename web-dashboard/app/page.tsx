@@ -5,6 +5,14 @@ import { createChart, ColorType, CandlestickSeries, LineSeries, IChartApi, ISeri
 import { cn } from '@/lib/utils';
 import { ArrowUp, ArrowDown, DollarSign, Activity, Wallet, Cpu, TrendingUp, RefreshCw, Settings, ShieldCheck, Server, Globe, Calendar, Download } from 'lucide-react';
 
+// Bridge push stream (tick_stream.py) and its frame keys
+const BRIDGE_STREAM_URL = process.env.NEXT_PUBLIC_BRIDGE_STREAM_URL || 'http://127.0.0.1:8766/stream';
+const STREAM_KEYS: Record<string, string> = {
+  t: 'timestamp', s: 'symbol', b: 'bid', a: 'ask', e: 'equity', B: 'balance', p: 'profit', P: 'prediction',
+};
+// The bridge may track several symbols; this dashboard charts one
+const DASHBOARD_SYMBOL = 'XAUUSD';
+
 export default function Dashboard() {
   const [tick, setTick] = useState<any>(null);
   const [trades, setTrades] = useState<any[]>([]);
@@ -26,6 +34,7 @@ export default function Dashboard() {
   const vwapSeriesRef = useRef<ISeriesApi<"Line"> | null>(null);
   const cumulativePVRef = useRef<number>(0);
   const cumulativeVRef = useRef<number>(0);
+  const streamActiveRef = useRef(false);
 
   // Load Config on Load
   useEffect(() => {
@@ -102,7 +111,7 @@ export default function Dashboard() {
 
     const fetchHistory = async () => {
       try {
-        const res = await fetch(`/api/history?tf=${currentTimeframe}`);
+        const res = await fetch(`/api/history?tf=${currentTimeframe}&symbol=${DASHBOARD_SYMBOL}`);
         const data = await res.json();
         if (Array.isArray(data) && data.length > 0) {
           const sorted = data
@@ -144,38 +153,70 @@ export default function Dashboard() {
     fetchHistory();
   }, [series, currentTimeframe]);
 
-  // 3. Poll Real-Time Data
+  // 3. Real-Time Data
+  const applyTick = (dataTick: any) => {
+    if (!(dataTick.bid > 0)) return;
+    setTick(dataTick);
+    setLastTickTime(Date.now());
+    setSystemStatus('ONLINE');
+
+    if (series) {
+      const price = dataTick.bid;
+      if (price < 100) return;
+
+      setLastCandle((prev: any) => {
+        if (!prev) return null;
+        const updated = {
+          ...prev,
+          close: price,
+          high: Math.max(prev.high, price),
+          low: Math.min(prev.low, price)
+        };
+        series.update(updated);
+
+        // Update VWAP live (Estimate)
+        const vwapValue = (cumulativePVRef.current + price) / (cumulativeVRef.current + 1);
+        vwapSeriesRef.current?.update({ time: updated.time, value: vwapValue });
+
+        return updated;
+      });
+    }
+  };
+
+  // 3a. Push stream from the bridge (python bridge.py --stream): compact delta frames
+  useEffect(() => {
+    if (!series) return;
+    const source = new EventSource(BRIDGE_STREAM_URL);
+    let state: any = {};
+
+    source.onmessage = (event) => {
+      const frame = JSON.parse(event.data);
+      if (frame.s !== DASHBOARD_SYMBOL) return; // Deltas are per symbol
+      for (const key in frame) {
+        state[STREAM_KEYS[key] ?? key] = frame[key];
+      }
+      streamActiveRef.current = true;
+      applyTick({ ...state });
+    };
+    source.onerror = () => {
+      // EventSource reconnects by itself; polling takes over meanwhile
+      streamActiveRef.current = false;
+      state = {};
+    };
+
+    return () => {
+      source.close();
+      streamActiveRef.current = false;
+    };
+  }, [series]);
+
+  // 3b. Poll Real-Time Data (ticks only while the push stream is down)
   useEffect(() => {
     const interval = setInterval(async () => {
       try {
-        const resTick = await fetch('/api/tick');
-        const dataTick = await resTick.json();
-        if (dataTick.bid > 0) {
-          setTick(dataTick);
-          setLastTickTime(Date.now());
-          setSystemStatus('ONLINE');
-
-          if (series && lastCandle) {
-            const price = dataTick.bid;
-            if (price < 100) return;
-
-            setLastCandle((prev: any) => {
-              if (!prev) return null;
-              const updated = {
-                ...prev,
-                close: price,
-                high: Math.max(prev.high, price),
-                low: Math.min(prev.low, price)
-              };
-              series.update(updated);
-
-              // Update VWAP live (Estimate)
-              const vwapValue = (cumulativePVRef.current + price) / (cumulativeVRef.current + 1);
-              vwapSeriesRef.current?.update({ time: updated.time, value: vwapValue });
-
-              return updated;
-            });
-          }
+        if (!streamActiveRef.current) {
+          const resTick = await fetch(`/api/tick?symbol=${DASHBOARD_SYMBOL}`);
+          applyTick(await resTick.json());
         }
 
         const resTrades = await fetch('/api/trade');
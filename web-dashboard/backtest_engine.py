@@ -1,169 +1,328 @@
-import MetaTrader5 as mt5
+try:
+    import MetaTrader5 as mt5
+except ImportError: # No terminal (e.g. Linux): backtest from the bar cache
+    mt5 = None
 import pandas as pd
 import numpy as np
+import argparse
 import json
 import sys
 from datetime import datetime, timedelta
-from strategy_v2 import calc_indicators, analyze_breakout
-
-def run_backtest(symbol, start_date_str, end_date_str, timeframe_str="M15"):
-    if not mt5.initialize():
-        return {"error": "MT5 Init Failed"}
-
-    # Timeframes mapping
-    tf_map = {
-        "M1": mt5.TIMEFRAME_M1,
-        "M5": mt5.TIMEFRAME_M5,
-        "M15": mt5.TIMEFRAME_M15,
-        "H1": mt5.TIMEFRAME_H1
-    }
-    mt5_tf = tf_map.get(timeframe_str, mt5.TIMEFRAME_M15)
+from data_provider import BarProvider
+from strategy_v2 import calc_indicators, analyze_breakout, VOLUME_RATIO_MIN, RANGE_WINDOW
 
-    # Convert dates
-    start_dt = datetime.strptime(start_date_str, "%Y-%m-%d")
-    end_dt = datetime.strptime(end_date_str, "%Y-%m-%d") + timedelta(days=1)
+TIMEFRAMES = ("M1", "M5", "M15", "H1")
 
+INITIAL_BALANCE = 10000.0
+RISK_PER_TRADE = 100.0 # Loss at the original SL (1R)
+SL_ATR_MULT = 2.0
+TP_ATR_MULT = 6.0 # 3:1 Reward (3R)
 
-    rates = mt5.copy_rates_range(symbol, mt5_tf, start_dt, end_dt)
-    
-    if rates is None or len(rates) == 0:
-        mt5.shutdown()
-        return {"error": "No data found for period"}
+# Tunable strategy parameters (see backtest_sweep.py)
+DEFAULT_PARAMS = {
+    "vol_threshold": VOLUME_RATIO_MIN,
+    "sl_mult": SL_ATR_MULT,
+    "reward": TP_ATR_MULT / SL_ATR_MULT,
+    "range_window": RANGE_WINDOW,
+}
 
-    df = pd.DataFrame(rates)
-    df['time'] = pd.to_datetime(df['time'], unit='s')
-    df.set_index('time', inplace=True)
+OUTPUT_FORMATS = ("full", "compact", "summary", "ndjson")
+PAGE_SIZE = 500 # Trades per NDJSON page
+
+# Trade exit reasons
+EXIT_SL = 0
+EXIT_TP = 1
+
+TRADE_DTYPE = np.dtype([
+    ("side", np.int8),          # 1: BUY, -1: SELL
+    ("entry_idx", np.int64),
+    ("exit_idx", np.int64),
+    ("entry_price", np.float64),
+    ("exit_price", np.float64),
+    ("sl", np.float64),         # Final SL (entry price once break-even triggered)
+    ("original_sl", np.float64),
+    ("tp", np.float64),
+    ("be_triggered", np.bool_),
+    ("exit_reason", np.int8),
+    ("profit", np.float64),
+])
+
+def _first_exit(high, low, start, side, sl, tp, be_level, block=256):
+    """Scans bars from `start` for the first SL, TP or break-even touch.
+
+    Returns (index, event) with event 'sl', 'tp' or 'be', or (None, None) if the
+    trade is still open at the end of the data. SL wins when a bar touches both
+    levels, since the order inside the bar is unknown.
+    """
+    n = len(high)
+    j = start
+    while j < n:
+        k = min(n, j + block)
+        h = high[j:k]
+        l = low[j:k]
+        if side == 1:
+            sl_hit = l <= sl
+            tp_hit = h >= tp
+            be_hit = h >= be_level if be_level is not None else None
+        else:
+            sl_hit = h >= sl
+            tp_hit = l <= tp
+            be_hit = l <= be_level if be_level is not None else None
+
+        any_hit = sl_hit | tp_hit if be_hit is None else sl_hit | tp_hit | be_hit
+        if any_hit.any():
+            i = int(np.argmax(any_hit))
+            if sl_hit[i]:
+                return j + i, 'sl'
+            if tp_hit[i]:
+                return j + i, 'tp'
+            return j + i, 'be'
+        j = k
+        block *= 2 # Long trades: widen the scan window
+    return None, None
 
-    # Run Strategy
-    df = calc_indicators(df)
-    df = analyze_breakout(df)
+def simulate_trades(high, low, close, atr, signal, sl_mult=SL_ATR_MULT, tp_mult=TP_ATR_MULT, intrabar=True,
+                    start=0, return_open=False):
+    """Simulates the breakout trade management over contiguous bar arrays.
 
-    # Simulate Trades
+    Entries happen at the signal bar's close. With intrabar=True exits are
+    resolved against each later bar's high/low; intrabar=False checks the close
+    only (the pre-array engine behaviour). Returns a TRADE_DTYPE array of closed trades.
+
+    Only signals from bar `start` on are taken; `signal`/`atr` may end before the
+    price arrays (exits keep scanning to the end of the prices). With
+    return_open=True also returns the entry bar of a trade still open at the end (-1 if none).
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    if intrabar:
+        high = np.ascontiguousarray(high, dtype=np.float64)
+        low = np.ascontiguousarray(low, dtype=np.float64)
+    else:
+        high = low = close
+    if atr is None:
+        atr = np.full(len(close), 2.0) # Fallback
+    atr = np.ascontiguousarray(atr, dtype=np.float64)
+    signal = np.asarray(signal)
+
+    reward = RISK_PER_TRADE * tp_mult / sl_mult
     trades = []
-    equity = 10000.0
-    balance = 10000.0
-    total_profit = 0
-    wins = 0
-    losses = 0
-    
-    active_trade = None
-    
-    for i in range(len(df)):
-        current_price = df['close'].iloc[i]
-        current_time = df.index[i]
-        signal = df['signal'].iloc[i]
-        
-        # 1. Check for Exit if trade active
-        if active_trade:
-            entry_price = active_trade['entry_price']
-            tp = active_trade['tp']
-            sl = active_trade['sl']
-            
-            # --- BREAK-EVEN LOGIC ---
-            if not active_trade.get('be_triggered', False):
-                # 1:1 Level reached? (Distance between entry and original SL)
-                dist_to_sl = abs(entry_price - active_trade['original_sl'])
-                if active_trade['type'] == 'BUY' and current_price >= (entry_price + dist_to_sl):
-                    active_trade['be_triggered'] = True
-                    active_trade['sl'] = entry_price
-                elif active_trade['type'] == 'SELL' and current_price <= (entry_price - dist_to_sl):
-                    active_trade['be_triggered'] = True
-                    active_trade['sl'] = entry_price
-
-            # Refresh SL from active_trade (might have been updated by BE)
-            sl = active_trade['sl']
-
-            # SL hit (or Break-Even)
-            if (active_trade['type'] == 'BUY' and current_price <= sl) or \
-               (active_trade['type'] == 'SELL' and current_price >= sl):
-                
-                profit = 0 if active_trade.get('be_triggered', False) else -100
-                balance += profit
-                active_trade['exit_price'] = sl
-                active_trade['exit_time'] = current_time.strftime("%Y-%m-%d %H:%M")
-                active_trade['profit'] = profit
-                trades.append(active_trade)
-                active_trade = None
-                if profit < 0: losses += 1
-            
-            # TP hit
-            elif (active_trade['type'] == 'BUY' and current_price >= tp) or \
-                 (active_trade['type'] == 'SELL' and current_price <= tp):
-                profit = 300 # 3R
-                balance += profit
-                active_trade['exit_price'] = tp
-                active_trade['exit_time'] = current_time.strftime("%Y-%m-%d %H:%M")
-                active_trade['profit'] = profit
-                trades.append(active_trade)
-                active_trade = None
-                wins += 1
-                
-        # 2. Check for Entry if no trade active
-        if not active_trade and signal != 0:
-            atr = df['ATR_14'].iloc[i] if 'ATR_14' in df.columns else 2.0 # Fallback
-            if signal == 1: # LONG
-                sl = current_price - (atr * 2)
-                tp = current_price + (atr * 6) # 3:1 Reward (3R)
-                active_trade = {
-                    "type": "BUY",
-                    "entry_price": current_price,
-                    "entry_time": current_time.strftime("%Y-%m-%d %H:%M"),
-                    "sl": sl,
-                    "original_sl": sl,
-                    "tp": tp,
-                    "motive": "Institutional Bullish Breakout (H4 High + Volume)",
-                    "be_triggered": False
-                }
-            elif signal == -1: # SHORT
-                sl = current_price + (atr * 2)
-                tp = current_price - (atr * 6) # 3:1 Reward (3R)
-                active_trade = {
-                    "type": "SELL",
-                    "entry_price": current_price,
-                    "entry_time": current_time.strftime("%Y-%m-%d %H:%M"),
-                    "sl": sl,
-                    "original_sl": sl,
-                    "tp": tp,
-                    "motive": "Institutional Bearish Breakout (H4 Low + Volume)",
-                    "be_triggered": False
-                }
-
-    mt5.shutdown()
-
-    # Post-process trades for grouping
+
+    entries = np.flatnonzero(signal[start:] != 0) + start
+    next_free = start # First bar where a new entry is allowed
+    open_idx = -1
+    for i in entries:
+        if i < next_free:
+            continue
+
+        side = 1 if signal[i] > 0 else -1
+        entry = close[i]
+        sl = entry - side * atr[i] * sl_mult
+        tp = entry + side * atr[i] * tp_mult
+        original_sl = sl
+        be_level = entry + side * abs(entry - original_sl) # 1:1 Level
+
+        exit_idx, event = _first_exit(high, low, i + 1, side, sl, tp, be_level)
+        be_triggered = event in ('be', 'tp') # TP is beyond the 1:1 level, so BE was reached too
+        if event == 'be':
+            # Break-even: SL moves to entry from the next bar on
+            exit_idx, event = _first_exit(high, low, exit_idx + 1, side, entry, tp, None)
+        if be_triggered:
+            sl = entry
+
+        if event is None:
+            open_idx = int(i)
+            break # Still open when data ends
+
+        if event == 'tp':
+            exit_price, reason, profit = tp, EXIT_TP, reward
+        else:
+            exit_price, reason = sl, EXIT_SL
+            profit = 0.0 if be_triggered else -RISK_PER_TRADE
+
+        trades.append((side, i, exit_idx, entry, exit_price, sl, original_sl, tp, be_triggered, reason, profit))
+        # Exits are checked before entries, so the exit bar may open a new trade
+        next_free = exit_idx
+
+    trades = np.array(trades, dtype=TRADE_DTYPE)
+    return (trades, open_idx) if return_open else trades
+
+def _format_times(times, idx):
+    if len(idx) == 0:
+        return np.array([], dtype=str)
+    return np.char.replace(np.datetime_as_string(times[idx], unit='m'), 'T', ' ')
+
+def trades_to_records(trades, times):
+    """Converts a TRADE_DTYPE array into the JSON trade dicts returned by run_backtest"""
+    times = np.asarray(times, dtype='datetime64[s]')
+    entry_times = _format_times(times, trades['entry_idx'])
+    exit_times = _format_times(times, trades['exit_idx'])
+
+    records = []
+    for t, entry_time, exit_time in zip(trades.tolist(), entry_times.tolist(), exit_times.tolist()):
+        side, _, _, entry_price, exit_price, sl, original_sl, tp, be_triggered, _, profit = t
+        records.append({
+            "type": "BUY" if side == 1 else "SELL",
+            "entry_price": entry_price,
+            "entry_time": entry_time,
+            "sl": sl,
+            "original_sl": original_sl,
+            "tp": tp,
+            "motive": "Institutional Bullish Breakout (H4 High + Volume)" if side == 1 else "Institutional Bearish Breakout (H4 Low + Volume)",
+            "be_triggered": be_triggered,
+            "exit_price": exit_price,
+            "exit_time": exit_time,
+            "profit": profit,
+        })
+    return records
+
+def summarize(trades, times, daily=True):
+    """Summary block of the backtest result (totals + daily breakdown by entry day)"""
+    profit = trades['profit']
+    wins = int(np.count_nonzero(trades['exit_reason'] == EXIT_TP))
+    losses = int(np.count_nonzero(profit < 0))
+    balance = INITIAL_BALANCE + float(profit.sum())
+    equity = INITIAL_BALANCE + np.cumsum(profit)
+    peak = np.maximum.accumulate(np.concatenate(([INITIAL_BALANCE], equity)))[1:]
+
+    summary = {
+        "total_trades": len(trades),
+        "wins": wins,
+        "losses": losses,
+        "win_rate": (wins / len(trades) * 100) if len(trades) > 0 else 0,
+        "final_balance": balance,
+        "profit": balance - INITIAL_BALANCE,
+        "max_drawdown": float((peak - equity).max()) if len(trades) > 0 else 0.0,
+    }
+    if not daily:
+        return summary
+
+    times = np.asarray(times, dtype='datetime64[s]')
     daily_stats = {}
-    for t in trades:
-        day = t['entry_time'].split(' ')[0]
+    days = times[trades['entry_idx']].astype('datetime64[D]').astype(str)
+    for day, p in zip(days.tolist(), profit.tolist()):
         if day not in daily_stats:
             daily_stats[day] = {"trades": 0, "wins": 0, "losses": 0, "profit": 0}
-        
+
         daily_stats[day]["trades"] += 1
-        if t['profit'] > 0:
+        if p > 0:
             daily_stats[day]["wins"] += 1
         else:
             daily_stats[day]["losses"] += 1
-        daily_stats[day]["profit"] += t['profit']
-
-    results = {
-        "summary": {
-            "total_trades": len(trades),
-            "wins": wins,
-            "losses": losses,
-            "win_rate": (wins / len(trades) * 100) if len(trades) > 0 else 0,
-            "final_balance": balance,
-            "profit": balance - 10000.0,
-            "daily_breakdown": daily_stats
-        },
-        "trades": trades # Return ALL trades
+        daily_stats[day]["profit"] += p
+
+    summary["daily_breakdown"] = daily_stats
+    return summary
+
+def backtest_arrays(df, intrabar=True, symbol=None, timeframe=None, params=None):
+    """Runs strategy + simulation over a time-indexed OHLCV DataFrame. Returns (trades, times)"""
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    df = calc_indicators(df, symbol=symbol, timeframe=timeframe, range_window=p['range_window'])
+    df = analyze_breakout(df, vol_threshold=p['vol_threshold'])
+
+    trades = simulate_trades(
+        df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(),
+        df['ATR_14'].to_numpy(), df['signal'].to_numpy(),
+        sl_mult=p['sl_mult'], tp_mult=p['sl_mult'] * p['reward'], intrabar=intrabar
+    )
+    return trades, df.index.values
+
+def trades_to_columns(trades, times):
+    """Compact columnar encoding: parallel arrays, epoch-second times, side as 1 (BUY) / -1 (SELL)"""
+    epoch = np.asarray(times, dtype='datetime64[s]').astype(np.int64)
+    return {
+        "side": trades['side'].tolist(),
+        "entry_time": epoch[trades['entry_idx']].tolist(),
+        "exit_time": epoch[trades['exit_idx']].tolist(),
+        "entry_price": trades['entry_price'].tolist(),
+        "exit_price": trades['exit_price'].tolist(),
+        "sl": trades['sl'].tolist(),
+        "original_sl": trades['original_sl'].tolist(),
+        "tp": trades['tp'].tolist(),
+        "be_triggered": trades['be_triggered'].tolist(),
+        "profit": trades['profit'].tolist(),
     }
-    
-    return results
+
+def format_result(trades, times, output="full"):
+    """Result dict for the 'full' (trade dicts), 'compact' (columnar) or 'summary' (aggregates only) outputs"""
+    result = {"summary": summarize(trades, times)}
+    if output == "compact":
+        result["trades"] = trades_to_columns(trades, times)
+    elif output != "summary":
+        result["trades"] = trades_to_records(trades, times) # Return ALL trades
+    return result
+
+def iter_ndjson(trades, times, page_size=PAGE_SIZE, compact=False):
+    """NDJSON lines: the summary first, then the trades page by page (in exit order)"""
+    yield json.dumps({"summary": summarize(trades, times)}, separators=(',', ':')) + "\n"
+    encode = trades_to_columns if compact else trades_to_records
+    for page, start in enumerate(range(0, len(trades), page_size)):
+        chunk = trades[start:start + page_size]
+        yield json.dumps({"page": page, "trades": encode(chunk, times)}, separators=(',', ':')) + "\n"
+
+def backtest_df(df, intrabar=True, symbol=None, timeframe=None, params=None, output="full"):
+    """Runs strategy + simulation over a time-indexed OHLCV DataFrame"""
+    trades, times = backtest_arrays(df, intrabar=intrabar, symbol=symbol, timeframe=timeframe, params=params)
+    return format_result(trades, times, output)
+
+def load_rates(symbol, start_date_str, end_date_str, timeframe_str="M15", provider=None):
+    """Loads the bars for a backtest from the local cache, topped up from MT5 when it is available.
+
+    A long-lived caller (backtest_server) passes its own provider and keeps MT5
+    connected; otherwise MT5 is initialized for this call only. Returns (df, timeframe, error).
+    """
+    timeframe = timeframe_str if timeframe_str in TIMEFRAMES else "M15"
+
+    # Convert dates
+    start_dt = datetime.strptime(start_date_str, "%Y-%m-%d")
+    end_dt = datetime.strptime(end_date_str, "%Y-%m-%d") + timedelta(days=1)
+
+    if provider is not None:
+        online = provider.online
+        rates = provider.get_rates(symbol, timeframe, start_dt, end_dt)
+    else:
+        online = mt5 is not None and mt5.initialize()
+        try:
+            rates = BarProvider(online=online).get_rates(symbol, timeframe, start_dt, end_dt)
+        finally:
+            if online:
+                mt5.shutdown()
+
+    if rates is None or len(rates) == 0:
+        return None, timeframe, "No data found for period" if online else "MT5 Init Failed"
+
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    df.set_index('time', inplace=True)
+    return df, timeframe, None
+
+def run_backtest(symbol, start_date_str, end_date_str, timeframe_str="M15", intrabar=True, params=None, output="full"):
+    df, timeframe, error = load_rates(symbol, start_date_str, end_date_str, timeframe_str)
+    if error:
+        return {"error": error}
+
+    return backtest_df(df, intrabar=intrabar, symbol=symbol, timeframe=timeframe, params=params, output=output)
 
 if __name__ == "__main__":
     # CLI usage
-    if len(sys.argv) >= 3:
-        sym = sys.argv[1]
-        start = sys.argv[2]
-        end = sys.argv[3]
-        res = run_backtest(sym, start, end)
-        print(json.dumps(res, indent=2))
+    parser = argparse.ArgumentParser(description="Institutional Breakout backtest")
+    parser.add_argument("symbol")
+    parser.add_argument("start")
+    parser.add_argument("end")
+    parser.add_argument("timeframe", nargs="?", default="M15")
+    parser.add_argument("--close-only", action="store_true", help="Check exits on bar closes only")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="full")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--compact-pages", action="store_true", help="Columnar trade pages in ndjson output")
+    args = parser.parse_args()
+
+    if args.format == "ndjson":
+        df, timeframe, error = load_rates(args.symbol, args.start, args.end, args.timeframe)
+        if error:
+            print(json.dumps({"error": error}))
+        else:
+            trades, times = backtest_arrays(df, intrabar=not args.close_only, symbol=args.symbol, timeframe=timeframe)
+            for line in iter_ndjson(trades, times, args.page_size, args.compact_pages):
+                sys.stdout.write(line)
+    else:
+        res = run_backtest(args.symbol, args.start, args.end, args.timeframe, intrabar=not args.close_only, output=args.format)
+        json.dump(res, sys.stdout, separators=(',', ':'))
@@ -0,0 +1,180 @@
+try:
+    import MetaTrader5 as mt5
+except ImportError:
+    mt5 = None
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from backtest_engine import load_rates, backtest_arrays, format_result, iter_ndjson, OUTPUT_FORMATS, PAGE_SIZE
+from data_provider import BarProvider
+
+# Long-lived backtest service for the dashboard: pandas/MT5 are imported and
+# connected once (reconnected if the terminal goes away), bars come from the
+# memory-mapped cache, indicator columns stay memoized in-process and finished
+# results are cached by request + data. Only MT5/cache reads are serialized,
+# so concurrent backtests don't queue behind each other. Results are cached as
+# trade arrays and encoded per request (full, compact, summary or streamed
+# NDJSON).
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', handlers=[logging.StreamHandler(sys.stdout)])
+logger = logging.getLogger(__name__)
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("BACKTEST_PORT", 8765))
+RESULT_CACHE_SIZE = 64
+RECONNECT_INTERVAL = 30.0 # seconds between MT5 reconnect attempts while it is unavailable
+# mt5.last_error() codes of a lost terminal connection (RES_E_INTERNAL_FAIL_*, e.g. MT5 was restarted)
+IPC_ERRORS = range(-10005, -9999)
+# HTTP status of the service errors load_rates reports (others: 422)
+ERROR_STATUS = {"No data found for period": 404, "MT5 Init Failed": 503}
+
+class BacktestService:
+    def __init__(self):
+        self.lock = threading.Lock() # MT5 and the provider are used from one thread at a time
+        self.results_lock = threading.Lock() # Result cache and stats; backtests themselves run unlocked
+        self.results = OrderedDict()
+        self.stats = {"requests": 0, "cache_hits": 0, "reconnects": 0}
+        self.provider = None
+        self.connected_at = 0.0
+        self.connect()
+
+    def connect(self):
+        if self.provider is not None and self.provider.online:
+            mt5.shutdown() # Drop the dead connection before initializing a new one
+        online = mt5 is not None and mt5.initialize()
+        if not online:
+            logger.warning("MT5 not available, serving backtests from cached bars only")
+        self.provider = BarProvider(online=online)
+        self.connected_at = time.monotonic()
+
+    def _load(self, symbol, start, end, timeframe):
+        """load_rates through the provider, reconnecting to MT5 when it is down or a fetch lost the terminal (caller holds the lock)"""
+        if mt5 is not None and not self.provider.online and time.monotonic() - self.connected_at >= RECONNECT_INTERVAL:
+            self.connect()
+        df, timeframe, error = load_rates(symbol, start, end, timeframe, provider=self.provider)
+        if self.provider.online and mt5.last_error()[0] in IPC_ERRORS:
+            logger.warning(f"MT5 connection lost ({mt5.last_error()}), reconnecting")
+            with self.results_lock:
+                self.stats["reconnects"] += 1
+            self.connect()
+            if self.provider.online:
+                df, timeframe, error = load_rates(symbol, start, end, timeframe, provider=self.provider)
+        return df, timeframe, error
+
+    def _fingerprint(self, df):
+        """Identifies the loaded bars: size, first bar and the (possibly still forming) last bar"""
+        h = hashlib.blake2b(digest_size=12)
+        h.update(str((len(df), df.index[0].value, df.index[-1].value)).encode())
+        h.update(df.iloc[-1].to_numpy().tobytes())
+        return h.hexdigest()
+
+    def run(self, req):
+        """Returns ((trades, times), None) or (None, error)"""
+        symbol = req.get("symbol", "XAUUSD")
+        start, end = req["startDate"], req["endDate"]
+        timeframe = req.get("timeframe") or "M15"
+        params = req.get("params") or {}
+        intrabar = req.get("intrabar", True)
+
+        with self.lock:
+            df, timeframe, error = self._load(symbol, start, end, timeframe)
+        with self.results_lock:
+            self.stats["requests"] += 1
+        if error:
+            return None, error
+
+        key = (symbol, start, end, timeframe, json.dumps(params, sort_keys=True), intrabar, self._fingerprint(df))
+        with self.results_lock:
+            cached = self.results.get(key)
+            if cached is not None:
+                self.results.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return cached, None
+
+        # The indicator memo behind symbol= is keyed on the last bar's OHLCV too, so a revised bar recomputes.
+        # Identical concurrent requests may both compute; the result is the same either way.
+        result = backtest_arrays(df, intrabar=intrabar, symbol=symbol, timeframe=timeframe, params=params)
+        with self.results_lock:
+            self.results[key] = result
+            while len(self.results) > RESULT_CACHE_SIZE:
+                self.results.popitem(last=False)
+        return result, None
+
+class Handler(BaseHTTPRequestHandler):
+    service = None
+
+    def _reply(self, status, body):
+        data = json.dumps(body, separators=(',', ':')).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, lines, status=200):
+        # HTTP/1.0 response: the body ends when the connection closes, so pages go out as they are encoded
+        self.send_response(status)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for line in lines:
+            self.wfile.write(line.encode())
+            self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"ok": True, "online": self.service.provider.online, "cached_results": len(self.service.results), **self.service.stats})
+        else:
+            self._reply(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/backtest":
+            self._reply(404, {"error": "Not found"})
+            return
+        try:
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            output = req.get("format", "full")
+            if output not in OUTPUT_FORMATS:
+                self._reply(400, {"error": f"Unknown format: {output}"})
+                return
+
+            t0 = time.perf_counter()
+            result, error = self.service.run(req)
+            logger.info(f"Backtest {req.get('symbol')} {req.get('startDate')}..{req.get('endDate')} in {(time.perf_counter() - t0) * 1000:.1f} ms")
+            if error:
+                status = ERROR_STATUS.get(error, 422)
+                if output == "ndjson":
+                    self._stream([json.dumps({"error": error}, separators=(',', ':')) + "\n"], status)
+                else:
+                    self._reply(status, {"error": error})
+            elif output == "ndjson":
+                self._stream(iter_ndjson(*result, page_size=int(req.get("pageSize", PAGE_SIZE)), compact=bool(req.get("compactPages"))))
+            else:
+                self._reply(200, format_result(*result, output))
+        except Exception as e:
+            logger.error(f"Backtest request failed: {e}")
+            self._reply(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        pass # Request logging goes through the logger above
+
+def main():
+    Handler.service = BacktestService()
+    server = ThreadingHTTPServer((HOST, PORT), Handler)
+    logger.info(f"Backtest service listening on http://{HOST}:{PORT}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if mt5 is not None and Handler.service.provider.online:
+            mt5.shutdown()
+
+if __name__ == "__main__":
+    main()
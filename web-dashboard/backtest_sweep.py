@@ -0,0 +1,85 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import shared_bars
+from backtest_engine import load_rates, simulate_trades, summarize, DEFAULT_PARAMS
+from strategy_v2 import breakout_signal
+from indicators import breakout_columns
+
+# Parameter sweep: bars are downloaded once, placed in shared memory and every
+# worker reads them through NumPy views (no per-worker copies or re-downloads).
+
+DEFAULT_GRID = {
+    "vol_threshold": [1.2, 1.3, 1.5, 1.8, 2.0],
+    "sl_mult": [1.5, 2.0, 2.5],
+    "reward": [2.0, 3.0],
+    "range_window": [12, 16, 24],
+}
+
+# --- Worker side ---
+_columns = {} # range_window -> indicator columns (per worker)
+
+def _run_combo(combo):
+    params = dict(DEFAULT_PARAMS, **combo)
+    high, low, close, volume, session = shared_bars.bars()
+
+    window = int(params['range_window'])
+    if window not in _columns:
+        _columns[window] = breakout_columns(
+            {"high": high, "low": low, "close": close, "tick_volume": volume}, range_window=window
+        )
+    cols = _columns[window]
+
+    signal = breakout_signal(close, cols['h4_high'], cols['h4_low'], cols['volume_ratio'], session, params['vol_threshold'])
+    trades = simulate_trades(
+        high, low, close, cols['ATR_14'], signal,
+        sl_mult=params['sl_mult'], tp_mult=params['sl_mult'] * params['reward'], intrabar=params.get('intrabar', True)
+    )
+    return {"params": combo, **summarize(trades, None, daily=False)}
+
+# --- Parent side ---
+def expand_grid(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def run_sweep(symbol, start_date_str, end_date_str, timeframe_str="M15", grid=None, workers=None, rank_by="profit", top=None):
+    df, _, error = load_rates(symbol, start_date_str, end_date_str, timeframe_str)
+    if error:
+        return {"error": error}
+    return sweep_df(df, grid or DEFAULT_GRID, workers=workers, rank_by=rank_by, top=top)
+
+def sweep_df(df, grid, workers=None, rank_by="profit", top=None):
+    """Runs every grid combination over a time-indexed OHLCV DataFrame, ranked by `rank_by` (descending)"""
+    combos = expand_grid(grid)
+    workers = workers or os.cpu_count() or 1
+
+    with shared_bars.share(df) as initargs:
+        with ProcessPoolExecutor(max_workers=workers, initializer=shared_bars.attach, initargs=initargs) as pool:
+            results = list(pool.map(_run_combo, combos, chunksize=max(1, len(combos) // (workers * 4))))
+
+    results.sort(key=lambda r: r[rank_by], reverse=True)
+    return {
+        "bars": len(df),
+        "combinations": len(combos),
+        "rank_by": rank_by,
+        "results": results[:top] if top else results
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep for the breakout backtest")
+    parser.add_argument("symbol")
+    parser.add_argument("start")
+    parser.add_argument("end")
+    parser.add_argument("timeframe", nargs="?", default="M15")
+    parser.add_argument("--grid", help="JSON object of parameter -> list of values (defaults to DEFAULT_GRID)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="profit")
+    parser.add_argument("--top", type=int, default=None)
+    args = parser.parse_args()
+
+    grid = json.loads(args.grid) if args.grid else None
+    res = run_sweep(args.symbol, args.start, args.end, args.timeframe, grid, args.workers, args.rank_by, args.top)
+    json.dump(res, sys.stdout, indent=2)
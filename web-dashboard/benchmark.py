@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from backtest_engine import backtest_df
+from strategy_v2 import calc_indicators, analyze_breakout
+from synthetic_data import generate_bars, bars_frame, iter_ticks
+
+# Reproducible performance baseline: every stage runs on seeded synthetic
+# XAUUSD data, so numbers are comparable between commits and machines without
+# an MT5 terminal. Results are JSON (time, bars/sec, peak traced memory).
+#
+#   python benchmark.py --cases 10k,1y_M15 --output bench.json
+#   python benchmark.py --compare bench.json
+
+CASES = {
+    "10k": ("M15", 10_000),
+    "1y_M15": ("M15", 24_900), # ~1 trading year of 15-minute bars
+    "1y_M1": ("M1", 373_000),
+    "10y_M1": ("M1", 3_730_000),
+}
+DEFAULT_CASES = ("10k", "1y_M15", "1y_M1")
+STAGES = ("calc_indicators", "analyze_breakout", "run_backtest", "prepare_features")
+TICK_DAYS = 30
+
+def _measure(fn, setup, repeat):
+    """Best wall time over `repeat` runs, then one traced run for peak memory (MB)"""
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup()
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+
+    arg = setup()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 2**20
+
+def _stages(df):
+    """stage -> (fn, setup); setups hand every run a fresh copy so no stage sees cached columns"""
+    with_indicators = calc_indicators(df.copy())
+    stages = {
+        # symbol=None keeps the indicator memo out of the measurement
+        "calc_indicators": (calc_indicators, lambda: df.copy()),
+        "analyze_breakout": (analyze_breakout, lambda: with_indicators.copy()),
+        "run_backtest": (lambda d: backtest_df(d, output="full"), lambda: df.copy()),
+    }
+    try:
+        from ai_engine import prepare_features
+    except ImportError: # xgboost/joblib missing
+        return stages
+    stages["prepare_features"] = (prepare_features, lambda: df.reset_index())
+    return stages
+
+def run_case(name, repeat=3, seed=42):
+    timeframe, n = CASES[name]
+    df = bars_frame(generate_bars(n, timeframe, seed=seed))
+    stages = _stages(df)
+
+    results = []
+    for stage in STAGES:
+        row = {"case": name, "timeframe": timeframe, "stage": stage, "bars": n}
+        if stage not in stages:
+            row["skipped"] = "dependencies not installed"
+        else:
+            seconds, peak_mb = _measure(*stages[stage], repeat)
+            row.update(seconds=round(seconds, 6), bars_per_sec=round(n / seconds), peak_mb=round(peak_mb, 2))
+        results.append(row)
+    return results
+
+def run_ticks(days=TICK_DAYS, repeat=1, seed=42, timeframe="M15"):
+    """Tick-replay throughput over `days` of synthetic ticks (generation excluded)"""
+    from tick_backtest import TickReplay
+    chunks = list(iter_ticks(days, seed=seed))
+    ticks = sum(len(c) for c in chunks)
+
+    def replay(_):
+        r = TickReplay(timeframe)
+        for chunk in chunks:
+            r.feed(chunk)
+
+    seconds, peak_mb = _measure(replay, lambda: None, repeat)
+    return {
+        "case": f"{days}d_ticks", "timeframe": timeframe, "stage": "tick_replay", "ticks": ticks,
+        "seconds": round(seconds, 6), "ticks_per_sec": round(ticks / seconds), "peak_mb": round(peak_mb, 2)
+    }
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_benchmarks(cases=DEFAULT_CASES, repeat=3, seed=42, tick_days=TICK_DAYS):
+    results = []
+    for name in cases:
+        results.extend(run_case(name, repeat, seed))
+    if tick_days:
+        results.append(run_ticks(tick_days, seed=seed))
+    return {
+        "commit": _git_commit(),
+        "timestamp": pd.Timestamp.now(tz="UTC").isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare(current, baseline):
+    """Speedup (baseline seconds / current seconds) per case and stage"""
+    old = {(r["case"], r["stage"]): r for r in baseline["results"] if "seconds" in r}
+    rows = []
+    for r in current["results"]:
+        b = old.get((r["case"], r["stage"]))
+        if b is None or "seconds" not in r:
+            continue
+        rows.append({
+            "case": r["case"], "stage": r["stage"],
+            "baseline_s": b["seconds"], "current_s": r["seconds"],
+            "speedup": round(b["seconds"] / r["seconds"], 2) if r["seconds"] > 0 else None,
+            "peak_mb_delta": round(r["peak_mb"] - b["peak_mb"], 2),
+        })
+    return {"baseline_commit": baseline.get("commit"), "commit": current.get("commit"), "comparison": rows}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the strategy/backtest pipeline on synthetic XAUUSD data")
+    parser.add_argument("--cases", default=",".join(DEFAULT_CASES), help=f"Comma separated, from: {', '.join(CASES)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tick-days", type=int, default=TICK_DAYS, help="Days of ticks to replay (0 to skip)")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    args = parser.parse_args()
+
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    res = run_benchmarks(cases, args.repeat, args.seed, args.tick_days)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(res, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            res["comparison"] = compare(res, json.load(f))["comparison"]
+    json.dump(res, sys.stdout, indent=2)
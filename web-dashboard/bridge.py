@@ -1,16 +1,25 @@
+import time
+STARTED = time.monotonic() # Time-to-first-tick is measured from here (before the imports below)
+
 import MetaTrader5 as mt5
 import requests
-import time
 import json
 import logging
 import sys
-import pandas as pd
-import joblib
 import os
 import numpy as np
-import pytz
-from news_engine import get_today_news
-from strategy_v2 import is_ny_session, calc_indicators, analyze_breakout
+import argparse
+from datetime import datetime, timezone
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from news_engine import NewsCalendar
+from strategy_v2 import is_ny_session, BreakoutState
+from tick_stream import TickStream
+from model_registry import ModelRegistry
+import metrics
 
 # Setup logging
 logging.basicConfig(
@@ -22,119 +31,354 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # --- CONFIGURATION ---
-SYMBOL = "XAUUSD"
+SYMBOL = "XAUUSD" # Primary symbol: the dashboard chart and the trained model
+SYMBOLS = [SYMBOL] # Every symbol the scheduler tracks (--symbols)
 POLL_INTERVAL = 1.0  # seconds
+HISTORY_BARS = 200 # Window sent on the first sync of each timeframe
+MAX_BACKFILL_BARS = 5000 # Largest gap filled after a reconnect
+HISTORY_SYNC_INTERVAL = 15 # seconds; a sync only posts the bars that changed
+API_TICK_INTERVAL = 1.0 # seconds between /api/tick POSTs; the push stream gets every tick
+M15_SECONDS = 900
+PREDICTION_MAX_AGE = 60 # seconds; refreshes the volume ratio quoted in the cached analysis
+MAX_FAILED_CYCLES = 20 # Consecutive cycles without data before the terminal is treated as disconnected
+FIRST_TICK_TARGET = 1.0 # seconds from start to the first published tick (MT5 terminal already running)
 
 TIMEFRAMES = {
     "M1": mt5.TIMEFRAME_M1,
     "M5": mt5.TIMEFRAME_M5,
     "M15": mt5.TIMEFRAME_M15
-}
+} # Timeframes synced to /api/history for every symbol (--timeframes)
+
+# One pooled keep-alive session for every POST (a fresh TCP connection per tick adds latency)
+http_session = requests.Session()
+http_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+# Dashboard endpoint discovery: BRIDGE_API_BASE, else the first of API_PORTS that answers (probed in
+# parallel), else the last base found (cached on disk), else port 3000. Runs in the background at start
+# and again when a POST is refused (the dashboard may have started after us, or moved to another port).
+API_PORTS = (3000, 3001, 3002)
+API_PROBE_TIMEOUT = 0.5 # seconds
+API_REDISCOVER_INTERVAL = 10.0 # Min seconds between rediscoveries while POSTs are refused
+API_BASE_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_cache", "bridge", "api_base.txt")
+API_BASE = "http://localhost:3000/api" # Default fallback until discovery finishes
+_discovery_lock = threading.Lock()
+_discovery = None # Latest discovery thread
+_discovery_started = 0.0
+
+def _probe(port):
+    try:
+        # /api/tick is served from memory (/api/history would read the candle table)
+        requests.get(f"http://localhost:{port}/api/tick", timeout=API_PROBE_TIMEOUT)
+        return True
+    except requests.RequestException:
+        return False
 
 def get_api_base():
-    """Tries to find which port Next.js is running on (3000 or 3001)"""
-    for port in [3000, 3001, 3002]:
-        url = f"http://localhost:{port}/api/tick"
-        try:
-            # We don't send data here, just check if the endpoint exists
-            requests.get(f"http://localhost:{port}/api/history", timeout=0.5)
-            return f"http://localhost:{port}/api"
-        except:
-            continue
-    return "http://localhost:3000/api" # Default fallback
+    """Tries to find which port Next.js is running on"""
+    if os.environ.get("BRIDGE_API_BASE"):
+        return os.environ["BRIDGE_API_BASE"].rstrip("/")
+
+    pool = ThreadPoolExecutor(max_workers=len(API_PORTS), thread_name_prefix="api-probe")
+    try:
+        probes = [(port, pool.submit(_probe, port)) for port in API_PORTS]
+        for port, probe in probes: # Preference order; the first port that answers returns right away
+            if probe.result():
+                base = f"http://localhost:{port}/api"
+                try:
+                    os.makedirs(os.path.dirname(API_BASE_CACHE), exist_ok=True)
+                    with open(API_BASE_CACHE, "w") as f:
+                        f.write(base)
+                except OSError:
+                    pass
+                return base
+    finally:
+        pool.shutdown(wait=False)
+
+    try:
+        with open(API_BASE_CACHE, "r") as f:
+            return f.read().strip() or API_BASE
+    except OSError:
+        return API_BASE
+
+def start_api_discovery():
+    """Resolves API_BASE in a background thread (overlapping the MT5 connect); join it before the first POST.
 
-API_BASE = get_api_base()
-logger.info(f"Bridge target detected: {API_BASE}")
+    Returns the running discovery instead of starting a second one.
+    """
+    global _discovery, _discovery_started
+    def discover():
+        global API_BASE
+        API_BASE = get_api_base()
+        logger.info(f"Bridge target detected: {API_BASE}")
+    with _discovery_lock:
+        if _discovery is not None and _discovery.is_alive():
+            return _discovery
+        _discovery_started = time.monotonic()
+        _discovery = threading.Thread(target=discover, name="api-discovery", daemon=True)
+        _discovery.start()
+        return _discovery
+
+def rediscover_api():
+    """Re-runs discovery in the background after a refused POST, at most every API_REDISCOVER_INTERVAL"""
+    if time.monotonic() - _discovery_started >= API_REDISCOVER_INTERVAL:
+        start_api_discovery()
 
 # --- STATE ---
-last_candle_time = 0
-current_model = None
-model_features = []
-today_news = []
-last_news_sync = 0
+LEGACY_MODEL_PATH = "trading_model.pkl" # Served only while the registry (models/) is empty
+model_registry = ModelRegistry()
+model_manifest = None # Registry manifest of the model behind live_model
+live_model = None # LiveModel over the loaded model (primary symbol only)
+model_watch = None # Registry watcher thread, started by the first load
+news_calendar = NewsCalendar() # Last good copy from disk; refreshed in the background once the bridge runs
+feeds = {} # symbol -> SymbolFeed, filled by set_symbols()
+tick_stream = None # Local SSE push stream (--stream)
+ticks_polled = 0
+first_tick_latency = None # seconds from STARTED to the first published tick
+failed_cycles = 0
 
 def load_ai_model():
-    global current_model, model_features
-    if os.path.exists("trading_model.pkl"):
-        try:
-            data = joblib.load("trading_model.pkl")
-            current_model = data['model']
-            model_features = data['features']
-            logger.info(f"AI Model loaded successfully. Last trained: {data.get('timestamp')}")
-            return True
-        except Exception as e:
-            logger.error(f"Error loading model: {e}")
-    return False
+    """Loads the current registry model (or the legacy pickle) and starts hot-reloading new versions"""
+    global model_watch
+    if live_model is not None:
+        return True # Kept across reconnects; newer versions come through the watcher
+    since = model_registry.current_mtime()
+    try:
+        booster, manifest = model_registry.load()
+        if booster is None and os.path.exists(LEGACY_MODEL_PATH):
+            import joblib # With xgboost, the slowest imports of the bridge: only paid for a legacy pickle
+            data = joblib.load(LEGACY_MODEL_PATH)
+            booster = data['model'].get_booster()
+            manifest = {"version": "legacy", "features": data['features'], "timestamp": data.get('timestamp')}
+        if booster is not None:
+            swap_model(booster, manifest)
+    except Exception as e:
+        logger.error(f"Error loading model: {e}")
+    if model_watch is None:
+        model_watch = model_registry.watch(swap_model, since=since)
+    return live_model is not None
+
+def load_ai_model_async():
+    """Loads the model in a background thread; ticks go out without model probabilities until it is ready"""
+    thread = threading.Thread(target=load_ai_model, name="model-load", daemon=True)
+    thread.start()
+    return thread
+
+def swap_model(booster, manifest):
+    """Serves a loaded booster (called from the load/watch threads).
+
+    With the same timeframe the live model keeps its warm FeatureState and only
+    the booster is swapped, in one assignment: the poll loop never waits for a
+    reload and the next tick already uses the new version.
+    """
+    global live_model, model_manifest
+    from ai_engine import TRAINING_TIMEFRAME, TRAINING_BARS
+    from features import PIPELINE
+    if manifest.get("pipeline") != PIPELINE.signature:
+        logger.warning(f"Model {manifest.get('version')} was trained on other feature definitions: retrain it for accurate probabilities")
+    timeframe = manifest.get("timeframe", TRAINING_TIMEFRAME)
+    if live_model is not None and live_model.timeframe == timeframe:
+        live_model.set_booster(booster, manifest["features"])
+        metrics.count("model_reloads")
+    else:
+        live_model = LiveModel(booster, manifest["features"], timeframe, TRAINING_BARS)
+    model_manifest = manifest
+    logger.info(f"AI Model {manifest.get('version')} loaded. Last trained: {manifest.get('timestamp')}")
+
+class LiveModel:
+    """Per-tick class probabilities of the trained model for the forming bar of its training timeframe.
+
+    Features come from the incremental mode of the training pipeline
+    (features.FeatureState, seeded once with a batch run over the training
+    window, then O(1) per bar) and go through the booster's single-row
+    inplace_predict; the result is cached until the forming bar or the booster changes.
+    """
+
+    def __init__(self, booster, features, timeframe_str, seed_bars):
+        from features import FeatureState
+        self.symbol = SYMBOL
+        self.state = FeatureState()
+        self.timeframe = timeframe_str
+        self.mt5_tf = getattr(mt5, f"TIMEFRAME_{timeframe_str}")
+        self.seed_bars = seed_bars
+        self.cache_key = None
+        self.probs = None
+        self.set_booster(booster, features)
+
+    def set_booster(self, booster, features):
+        from features import PIPELINE
+        order = [PIPELINE.columns.index(f) for f in features] # ValueError for features the live path can't build
+        booster.set_param({"nthread": 1}) # One row per call: thread start-up costs more than it saves
+        self.model = (booster, order) # One assignment: readers never pair a booster with another's feature order
+
+    def probabilities(self):
+        """{"neutral", "long", "short"} in percent (training labels 0/1/2), or None without bars"""
+        model = self.model
+        warm = self.state.last_time is not None
+        rates = mt5.copy_rates_from_pos(self.symbol, self.mt5_tf, 0, 3 if warm else self.seed_bars)
+        if rates is not None and warm and len(rates) and int(rates[0]['time']) > self.state.last_time:
+            # Missed bars (reconnect/stall): re-seed from the training window
+            warm = False
+            rates = mt5.copy_rates_from_pos(self.symbol, self.mt5_tf, 0, self.seed_bars)
+        if rates is None or len(rates) == 0:
+            return None
+        if not warm:
+            # Seed with one vectorized batch over the closed bars (its end state); only the forming bar is stepped
+            self.state = self.state.pipeline.batch(rates[:-1], with_state=True)[1]
+            rates = rates[-1:]
+
+        last = rates[-1]
+        key = (model, int(last['time']), float(last['high']), float(last['low']), float(last['close']), int(last['tick_volume']))
+        if key != self.cache_key:
+            booster, order = model
+            x = self.state.update(rates)[order]
+            p = booster.inplace_predict(x[np.newaxis, :])[0]
+            self.probs = {"neutral": round(float(p[0]) * 100, 1), "long": round(float(p[1]) * 100, 1), "short": round(float(p[2]) * 100, 1)}
+            self.cache_key = key
+        return self.probs
 
 def send_to_api(endpoint, data):
+    stage = f"post_{endpoint}"
     try:
         url = f"{API_BASE}/{endpoint}"
         logger.debug(f"Sending to {url}")
-        response = requests.post(url, json=data, timeout=2)
+        with metrics.timer(stage):
+            response = http_session.post(url, json=data, timeout=2)
+        if response.status_code != 200:
+            metrics.error(stage)
         return response.status_code == 200
-    except Exception as e:
+    except Exception as e: # Already counted as an error by the timer
         logger.error(f"API Error ({endpoint}): {e}")
+        if isinstance(e, requests.ConnectionError): # Nothing listening on API_BASE (any more)
+            rediscover_api()
         return False
 
-def sync_history(tf_name, mt5_tf):
-    logger.info(f"Syncing history for {SYMBOL} [{tf_name}]...")
-    
-    # Get last 200 bars for better history
-    rates = mt5.copy_rates_from_pos(SYMBOL, mt5_tf, 0, 200)
-    if rates is None:
-        logger.error(f"Failed to copy rates for {SYMBOL} [{tf_name}]")
-        return
-    
-    candles = []
-    for rate in rates:
-        candles.append({
-            "time": int(rate['time']),
-            "open": float(rate['open']),
-            "high": float(rate['high']),
-            "low": float(rate['low']),
-            "close": float(rate['close']),
-            "volume": float(rate['tick_volume'])
-        })
-        
-    if send_to_api("history", {"candles": candles, "timeframe": tf_name}):
-        logger.info(f"Successfully synced {len(candles)} [{tf_name}] candles.")
-    else:
-        logger.warning(f"History sync failed for {tf_name} (API error).")
-
-def calc_ema(series, span):
-    return series.ewm(span=span, adjust=False).mean()
-
-def calc_rsi(series, period=14):
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
-
-def calc_atr(df, period=14):
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift())
-    low_close = np.abs(df['low'] - df['close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    return true_range.rolling(window=period).mean()
-
-def poll_tick():
-    # 1. Get Ticket Info
-    tick = mt5.symbol_info_tick(SYMBOL)
-    if tick is None:
-        logger.warning(f"Could not get tick for {SYMBOL}")
+def candle_from_rate(rate):
+    return {
+        "time": int(rate['time']),
+        "open": float(rate['open']),
+        "high": float(rate['high']),
+        "low": float(rate['low']),
+        "close": float(rate['close']),
+        "volume": float(rate['tick_volume'])
+    }
+
+class HistorySync:
+    """Delta sync of candles to /api/history, per symbol and timeframe.
+
+    Remembers the last closed bar the dashboard has persisted and the last
+    version of the forming bar it received. Each sync fetches only the tail
+    after that bar (widening the window when a reconnect left a gap) and posts
+    the new closed bars plus the forming bar if it changed, or nothing at all.
+    """
+
+    def __init__(self, initial_bars=HISTORY_BARS, max_backfill=MAX_BACKFILL_BARS):
+        self.initial_bars = initial_bars
+        self.max_backfill = max_backfill
+        self.last_closed = {} # (symbol, tf_name) -> time of the last persisted closed bar
+        self.forming = {} # (symbol, tf_name) -> last persisted version of the forming candle
+        self.lock = threading.Lock() # delta() runs on the MT5 thread, mark_sent() after the POST
+
+    def _fetch(self, symbol, mt5_tf, last):
+        if last is None:
+            return mt5.copy_rates_from_pos(symbol, mt5_tf, 0, self.initial_bars)
+        count = 3
+        while True:
+            rates = mt5.copy_rates_from_pos(symbol, mt5_tf, 0, count)
+            if rates is None or len(rates) < count or int(rates[0]['time']) <= last or count >= self.max_backfill:
+                return rates
+            # Gap (reconnect/stall): widen the window until it reaches the last persisted bar
+            count = min(count * 4, self.max_backfill)
+
+    def delta(self, symbol, tf_name, mt5_tf):
+        """(payload, sent_state) with the changed candles, or (None, None) when nothing changed"""
+        with self.lock:
+            last = self.last_closed.get((symbol, tf_name))
+            forming = self.forming.get((symbol, tf_name))
+
+        with metrics.timer("history_rates"):
+            rates = self._fetch(symbol, mt5_tf, last)
+        if rates is None:
+            metrics.error("history_rates")
+            logger.error(f"Failed to copy rates for {symbol} [{tf_name}]")
+            return None, None
+        if len(rates) == 0:
+            return None, None
+
+        candles = [candle_from_rate(rate) for rate in rates if last is None or int(rate['time']) > last]
+        current = candle_from_rate(rates[-1])
+        if candles and candles[-1] == forming:
+            candles.pop() # Forming bar unchanged since the last sync
+        if not candles:
+            return None, None
+
+        closed = int(rates[-2]['time']) if len(rates) > 1 else last
+        return {"candles": candles, "timeframe": tf_name, "symbol": symbol}, (closed, current)
+
+    def mark_sent(self, symbol, tf_name, sent_state):
+        key = (symbol, tf_name)
+        closed, current = sent_state
+        with self.lock:
+            if closed is not None:
+                self.last_closed[key] = max(closed, self.last_closed.get(key, closed))
+            self.forming[key] = current
+
+    def batch(self, symbols, timeframes):
+        """Deltas of every symbol/timeframe as one /api/history payload: (payload, sent) or (None, None)"""
+        batches = []
+        sent = [] # (symbol, tf_name, sent_state) to mark once the POST succeeds
+        for symbol in symbols:
+            for tf_name, mt5_tf in timeframes.items():
+                data, sent_state = self.delta(symbol, tf_name, mt5_tf)
+                if data is not None:
+                    batches.append(data)
+                    sent.append((symbol, tf_name, sent_state))
+        if not batches:
+            return None, None
+        return {"batches": batches}, sent
+
+    def mark_batch_sent(self, sent):
+        for symbol, tf_name, sent_state in sent:
+            self.mark_sent(symbol, tf_name, sent_state)
+
+history_sync = HistorySync()
+
+def log_history(data, ok):
+    if not ok:
+        logger.warning(f"History sync failed for {len(data['batches'])} symbol/timeframe batches (API error).")
         return
+    for batch in data['batches']:
+        count = len(batch['candles'])
+        if count > 2: # Initial window or backfill; routine deltas are one or two candles
+            logger.info(f"Successfully synced {count} {batch['symbol']} [{batch['timeframe']}] candles.")
+        else:
+            logger.debug(f"Synced {count} {batch['symbol']} [{batch['timeframe']}] candles.")
 
-    # 2. Get Account Info
-    account = mt5.account_info()
-    if account is None:
-        logger.warning("Could not get account info")
+def sync_history():
+    """Delta sync of every tracked symbol and timeframe in one POST"""
+    data, sent = history_sync.batch(feeds, TIMEFRAMES)
+    if data is None:
         return
+    ok = send_to_api("history", data)
+    if ok:
+        history_sync.mark_batch_sent(sent)
+    log_history(data, ok)
+
+def build_tick_payload(feed, account, event):
+    """Tick + account + strategy prediction of one symbol, ready to publish (None if MT5 returned no tick).
+
+    `account` and the news blackout `event` are read once per cycle by poll_cycle().
+    """
+    # 1. Get Ticket Info
+    with metrics.timer("symbol_info_tick"):
+        tick = mt5.symbol_info_tick(feed.symbol)
+    if tick is None:
+        metrics.error("symbol_info_tick")
+        logger.warning(f"Could not get tick for {feed.symbol}")
+        return None
 
-    # 3. Prepare Data
+    # 2. Prepare Data
     payload = {
-        "symbol": SYMBOL,
+        "symbol": feed.symbol,
         "bid": tick.bid,
         "ask": tick.ask,
         "equity": account.equity,
@@ -143,14 +387,28 @@ def poll_tick():
         "timestamp": int(time.time() * 1000)
     }
 
-    # 4. Context & News Analysis
-    global today_news, last_news_sync
-    if time.time() - last_news_sync > 3600: # Sync news every hour
-        today_news = get_today_news()
-        last_news_sync = time.time()
-        logger.info(f"Context Analysis: Today has {len(today_news)} key events.")
+    # 3. AI & Strategy Inference (strategy cached until the M15 signal can change, model per bar update)
+    with metrics.timer("strategy"):
+        prediction = feed.inference.get(tick)
+    if live_model is not None and live_model.symbol == feed.symbol:
+        try:
+            with metrics.timer("model"):
+                probs = live_model.probabilities()
+            if probs is not None:
+                prediction = {**prediction, **probs}
+        except Exception as e:
+            logger.error(f"Model inference error: {e}")
+
+    # 4. News proximity (Safety override): no signals inside a high impact event's blackout window
+    if event is not None:
+        metrics.count("news_blackout_ticks")
+        event_time = datetime.fromisoformat(event['date']).strftime('%H:%M')
+        prediction = {**prediction, "status": "NEUTRAL", "analysis": f"Notícia de alto impacto: {event['title']} ({event_time} NY). Sinais suspensos."}
+    payload["prediction"] = prediction
+    return payload
 
-    # 4. AI & Strategy Inference
+def compute_prediction(symbol, m15_state):
+    """Runs the M15 strategy of `symbol` on the latest bars. Returns (prediction, ok); ok is False when no bars were read."""
     prediction = {
         "status": "NEUTRAL",
         "long": 0.0, "long_hold": 0.0,
@@ -160,34 +418,30 @@ def poll_tick():
     }
 
     try:
-        # Get last 200 bars to calc indicators
-        rates = mt5.copy_rates_from_pos(SYMBOL, mt5.TIMEFRAME_M15, 0, 40) # M15 for Institutional Breakout
-        if rates is not None:
-            df = pd.DataFrame(rates)
-            df['time'] = pd.to_datetime(df['time'], unit='s')
-            df.set_index('time', inplace=True)
-            
+        # Warm the streaming state once, then only the last bars are needed
+        count = 3 if m15_state.last_time else 40
+        with metrics.timer("copy_rates_m15"):
+            rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M15, 0, count) # M15 for Institutional Breakout
+        if rates is not None and m15_state.last_time and int(rates[0]['time']) > m15_state.last_time:
+            # Missed bars (reconnect/stall): re-seed from a full window
+            m15_state.reset()
+            with metrics.timer("copy_rates_m15"):
+                rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M15, 0, 40)
+        if rates is None:
+            metrics.error("copy_rates_m15")
+        if rates is not None and len(rates) > 0:
             # Apply Strategy V2
-            df = calc_indicators(df)
-            df = analyze_breakout(df)
-            
-            last_row = df.iloc[-1]
+            last_row = m15_state.update(rates)
             signal = last_row['signal']
             vol_ratio = last_row['volume_ratio']
             
-            # Check for News proximity (Safety override)
-            news_danger = False
-            for event in today_news:
-                # Basic check: if event is within next 15 mins (mock logic)
-                pass # TODO: Implement precise time check if needed
-            
             if signal == 1:
                 prediction.update({"status": "LONG", "long": 85.0, "neutral": 15.0, "analysis": f"Institutional BUY detected. Vol Ratio: {vol_ratio:.2f}"})
             elif signal == -1:
                 prediction.update({"status": "SHORT", "short": 85.0, "neutral": 15.0, "analysis": f"Institutional SELL detected. Vol Ratio: {vol_ratio:.2f}"})
             else:
                 # Provide smarter feedback for Neutral status
-                current_time_utc = df.index[-1]
+                current_time_utc = datetime.fromtimestamp(int(last_row['time']), tz=timezone.utc).replace(tzinfo=None)
                 if not is_ny_session(current_time_utc):
                     prediction.update({"analysis": "Aguardando Sessão de NY (08:00 - 10:00 EST) para operar."})
                 elif vol_ratio < 1.3:
@@ -196,14 +450,162 @@ def poll_tick():
                     prediction.update({"analysis": "Monitorando rompimento de Máxima/Mínima de 4H."})
 
     except Exception as e:
+         metrics.error("strategy")
          logger.error(f"Inference error: {e}")
+         return prediction, False
 
-    payload["prediction"] = prediction
-    if send_to_api("tick", payload):
-        logger.info(f"Tick Broadcast: {SYMBOL} Bid={payload['bid']} AgentV2={prediction['status']}")
+    return prediction, m15_state.last is not None
+
+
+class InferenceScheduler:
+    """Reruns the M15 strategy only when its signal can change, otherwise returns the cached prediction.
+
+    The forming bar's signal compares its close (the bid) with the previous
+    bar's H4 range, needs its volume ratio above the threshold and the NY
+    session; within a bar only the bid and the (growing) volume move. So the
+    strategy reruns when a new bar opens, when the bid crosses one of the range
+    levels, or when the volume crosses the threshold in session (checked by
+    reading only the forming bar). The volume ratio quoted in the analysis is
+    refreshed every `max_age` seconds.
+    """
+
+    def __init__(self, symbol, state, period=M15_SECONDS, max_age=PREDICTION_MAX_AGE):
+        self.symbol = symbol
+        self.state = state
+        self.period = period
+        self.max_age = max_age
+        self.prediction = None
+        self.key = None # (bar time, bid side of the range) the cached prediction was computed for
+        self.levels = (np.nan, np.nan)
+        self.session = False
+        self.vol_ok = False
+        self.vol_needed = np.inf
+        self.computed_at = 0.0
+        self.stats = {"ticks": 0, "recomputes": 0}
+
+    def _side(self, bid):
+        prev_high, prev_low = self.levels
+        return 1 if bid > prev_high else -1 if bid < prev_low else 0 # NaN levels (warm-up) -> 0
+
+    def _stale(self, bar_time, side):
+        if self.key is None or self.key != (bar_time, side):
+            return True
+        if self.session and not self.vol_ok:
+            # In session the volume can still reach the threshold: only the forming bar is read to check it
+            rates = mt5.copy_rates_from_pos(self.symbol, mt5.TIMEFRAME_M15, 0, 1)
+            if rates is None or len(rates) == 0 or float(rates[-1]['tick_volume']) > self.vol_needed:
+                return True
+        return time.monotonic() - self.computed_at > self.max_age
+
+    def get(self, tick):
+        self.stats["ticks"] += 1
+        bar_time = int(tick.time) // self.period * self.period
+        if self.prediction is None or self._stale(bar_time, self._side(tick.bid)):
+            self._recompute(bar_time, tick.bid)
+        return self.prediction
+
+    def _recompute(self, bar_time, bid):
+        self.stats["recomputes"] += 1
+        metrics.count("strategy_recomputes")
+        self.prediction, ok = compute_prediction(self.symbol, self.state)
+        self.computed_at = time.monotonic()
+        last = self.state.last
+        if not ok or last is None:
+            self.key = None # Retry on the next tick
+            return
+        self.levels = self.state.prev_range
+        self.session = is_ny_session(datetime.fromtimestamp(last['time'], tz=timezone.utc).replace(tzinfo=None))
+        self.vol_ok = bool(last['volume_ratio'] > self.state.vol_threshold)
+        self.vol_needed = self.state.volume_needed()
+        self.key = (bar_time, self._side(bid))
+
+class SymbolFeed:
+    """Per-symbol scheduler state: streaming M15 indicators (Institutional Breakout) and their inference cache"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.m15_state = BreakoutState()
+        self.inference = InferenceScheduler(symbol, self.m15_state)
+
+def set_symbols(symbols):
+    """Tracks `symbols` (keeping the state of the ones already tracked)"""
+    global feeds
+    feeds = {symbol: feeds.get(symbol) or SymbolFeed(symbol) for symbol in symbols}
+
+set_symbols(SYMBOLS)
+
+
+def record_first_tick():
+    """Records (once) the time from start to the first tick reaching the dashboard"""
+    global first_tick_latency
+    if first_tick_latency is not None:
+        return
+    first_tick_latency = time.monotonic() - STARTED
+    metrics.observe("time_to_first_tick", first_tick_latency)
+    level = logging.INFO if first_tick_latency <= FIRST_TICK_TARGET else logging.WARNING
+    logger.log(level, f"First tick published {first_tick_latency:.2f}s after start (target {FIRST_TICK_TARGET:.1f}s).")
+
+def log_tick(data, ok):
+    if ok:
+        record_first_tick()
+        ticks = ", ".join(f"{p['symbol']} Bid={p['bid']} AgentV2={p['prediction']['status']}" for p in data['ticks'])
+        logger.info(f"Tick Broadcast: {ticks}")
     else:
         logger.warning("Failed to broadcast tick.")
 
+def api_tick_due():
+    """Counts a polled tick; True for the ones that are also POSTed to /api/tick"""
+    global ticks_polled
+    ticks_polled += 1
+    return (ticks_polled - 1) % max(1, round(API_TICK_INTERVAL / POLL_INTERVAL)) == 0
+
+def poll_cycle():
+    """One scheduler cycle: account_info and the news check once, then every symbol's tick and strategy.
+
+    Returns the tick payloads (symbols MT5 returned no tick for are left out).
+    """
+    with metrics.timer("account_info"):
+        account = mt5.account_info()
+    if account is None:
+        metrics.error("account_info")
+        logger.warning("Could not get account info")
+        return []
+
+    event = news_calendar.blackout()
+    payloads = []
+    for feed in feeds.values():
+        with metrics.timer("poll_tick"):
+            payload = build_tick_payload(feed, account, event)
+        if payload is not None:
+            payloads.append(payload)
+    return payloads
+
+def timed_poll_cycle():
+    global failed_cycles
+    with metrics.timer("poll_cycle"):
+        payloads = poll_cycle()
+    metrics.count("ticks", len(payloads))
+
+    # A lost terminal connection returns None from every call instead of raising: reconnect after a run of empty cycles
+    failed_cycles = 0 if payloads else failed_cycles + 1
+    if failed_cycles >= MAX_FAILED_CYCLES:
+        failed_cycles = 0
+        raise ConnectionError(f"No data from MT5 for {MAX_FAILED_CYCLES} cycles: {mt5.last_error()}")
+    return payloads
+
+def publish_ticks(payloads, send):
+    """Pushes a cycle's ticks to the stream as one write and, when due, hands one batched /api/tick payload to `send`"""
+    if not payloads:
+        return
+    if tick_stream is not None:
+        tick_stream.publish_batch(payloads)
+        record_first_tick()
+    if api_tick_due():
+        send({"ticks": payloads})
+
+def poll_ticks():
+    publish_ticks(timed_poll_cycle(), lambda data: log_tick(data, send_to_api("tick", data)))
+
 def load_config():
     try:
         with open('mt5_config.json', 'r') as f:
@@ -211,58 +613,220 @@ def load_config():
     except Exception:
         return None
 
+def connect_mt5():
+    with metrics.timer("connect"):
+        authorized = _initialize_mt5()
+    if not authorized:
+        metrics.count("connect_failures")
+    return authorized
+
+def _initialize_mt5():
+    config = load_config()
+    
+    authorized = False
+    if config and config.get('login') and config.get('password') != '****':
+        logger.info(f"Attempting login to account {config['login']} on {config['server']}...")
+        authorized = mt5.initialize(
+            login=int(config['login']),
+            server=config['server'],
+            password=config['password']
+        )
+        if not authorized:
+            logger.error(f"Account-specific login failed: {mt5.last_error()}")
+    
+    # Fallback: Try general initialization (uses currently active account in MT5)
+    if not authorized:
+        logger.info("Trying to connect to the currently active MT5 account...")
+        authorized = mt5.initialize()
+
+    if not authorized:
+        logger.error(f"MT5 Connection failed completely. Error: {mt5.last_error()}. Retrying in 10s...")
+        mt5.shutdown()
+        return False
+
+    # Symbols outside Market Watch return no ticks until selected
+    for symbol in feeds:
+        if not mt5.symbol_select(symbol, True):
+            logger.warning(f"Could not select {symbol} in Market Watch: {mt5.last_error()}")
+
+    logger.info(f"MT5 Connected and Authorized. Tracking {', '.join(feeds)} on {', '.join(TIMEFRAMES)}.")
+    return True
+
+def log_news(calendar):
+    logger.info(f"Context Analysis: Today has {len(calendar.today())} key events.")
+
 def main():
     logger.info("Initializing MT5 Bridge...")
+    api_discovery = start_api_discovery()
+    news_calendar.start(on_refresh=log_news)
     
     while True:
-        config = load_config()
-        
-        authorized = False
-        if config and config.get('login') and config.get('password') != '****':
-            logger.info(f"Attempting login to account {config['login']} on {config['server']}...")
-            authorized = mt5.initialize(
-                login=int(config['login']),
-                server=config['server'],
-                password=config['password']
-            )
-            if not authorized:
-                logger.error(f"Account-specific login failed: {mt5.last_error()}")
-        
-        # Fallback: Try general initialization (uses currently active account in MT5)
-        if not authorized:
-            logger.info("Trying to connect to the currently active MT5 account...")
-            authorized = mt5.initialize()
-
-        if not authorized:
-            logger.error(f"MT5 Connection failed completely. Error: {mt5.last_error()}. Retrying in 10s...")
-            mt5.shutdown()
+        if not connect_mt5():
             time.sleep(10)
             continue
 
-        logger.info("MT5 Connected and Authorized.")
-        load_ai_model()
+        load_ai_model_async()
+        api_discovery.join()
         
-        # Sync all timeframes on startup
-        for tf_name, mt5_tf in TIMEFRAMES.items():
-            sync_history(tf_name, mt5_tf)
+        # The first tick goes out before the history sync (after a reconnect the sync backfills the gap)
+        last_history_sync = None
         
         try:
             while True:
-                poll_tick()
-                current_time = int(time.time())
+                poll_ticks()
                 
-                # Sync history every 5 minutes for all TFs
-                if current_time % 300 == 0: 
-                     for tf_name, mt5_tf in TIMEFRAMES.items():
-                        sync_history(tf_name, mt5_tf)
+                # Delta history sync for all symbols and TFs
+                if last_history_sync is None or time.monotonic() - last_history_sync >= HISTORY_SYNC_INTERVAL:
+                    last_history_sync = time.monotonic()
+                    sync_history()
                         
                 time.sleep(POLL_INTERVAL)
         except Exception as e:
+            metrics.count("reconnects")
             logger.error(f"Bridge loop error: {e}. Re-initializing in 5s...")
             mt5.shutdown()
             time.sleep(5)
             
     mt5.shutdown()
 
+# --- ASYNC MODE ---
+# MT5 calls run on one dedicated thread (the MT5 API is not thread safe) and
+# POSTs on another over the keep-alive session. The tick loop only schedules
+# that work, so a slow dashboard can't shift the tick cadence: when publishing
+# falls behind, the oldest queued ticks are dropped instead of piling up.
+PUBLISH_QUEUE_SIZE = 8
+TICK_MAX_AGE = 2.0 # seconds; a queued tick older than this is stale and skipped
+
+class PublishQueue:
+    """Bounded FIFO of (endpoint, data, queued_at, on_sent). On overflow the oldest tick is dropped; history never is."""
+
+    def __init__(self, maxsize=PUBLISH_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def put(self, endpoint, data, on_sent=None):
+        if len(self.items) >= self.maxsize:
+            for i, item in enumerate(self.items):
+                if item[0] == "tick":
+                    del self.items[i]
+                    self.dropped += 1
+                    metrics.count("dropped_ticks")
+                    break
+        self.items.append((endpoint, data, time.monotonic(), on_sent))
+        self.ready.set()
+
+    async def get(self):
+        while not self.items:
+            self.ready.clear()
+            await self.ready.wait()
+        return self.items.popleft()
+
+async def publisher(queue, http_thread):
+    loop = asyncio.get_running_loop()
+    while True:
+        endpoint, data, queued_at, on_sent = await queue.get()
+        if endpoint == "tick" and time.monotonic() - queued_at > TICK_MAX_AGE:
+            queue.dropped += 1
+            metrics.count("dropped_ticks")
+            logger.debug(f"Dropped stale tick ({queue.dropped} so far)")
+            continue
+        ok = await loop.run_in_executor(http_thread, send_to_api, endpoint, data)
+        if ok and on_sent is not None:
+            on_sent()
+        if endpoint == "tick":
+            log_tick(data, ok)
+        elif endpoint == "history":
+            log_history(data, ok)
+
+async def queue_history(queue, mt5_thread):
+    loop = asyncio.get_running_loop()
+    data, sent = await loop.run_in_executor(mt5_thread, history_sync.batch, feeds, TIMEFRAMES)
+    if data is not None:
+        queue.put("history", data, lambda: history_sync.mark_batch_sent(sent))
+
+async def tick_loop(queue, mt5_thread):
+    loop = asyncio.get_running_loop()
+    next_tick = loop.time()
+    last_history = None # Queued right after the first tick
+    while True:
+        # Every symbol's MT5 reads in one hop to the MT5 thread
+        payloads = await loop.run_in_executor(mt5_thread, timed_poll_cycle)
+        publish_ticks(payloads, lambda data: queue.put("tick", data))
+
+        if last_history is None or loop.time() - last_history >= HISTORY_SYNC_INTERVAL:
+            last_history = loop.time()
+            await queue_history(queue, mt5_thread)
+
+        # Fixed cadence; after a stall (slow MT5 call) skip the missed ticks instead of bursting
+        next_tick += POLL_INTERVAL
+        delay = next_tick - loop.time()
+        if delay < 0:
+            next_tick = loop.time()
+            delay = 0
+        await asyncio.sleep(delay)
+
+async def run_async():
+    logger.info("Initializing MT5 Bridge (async mode)...")
+    api_discovery = start_api_discovery()
+    news_calendar.start(on_refresh=log_news)
+    loop = asyncio.get_running_loop()
+    mt5_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
+    http_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="http")
+    queue = PublishQueue()
+    publish_task = asyncio.create_task(publisher(queue, http_thread))
+
+    try:
+        while True:
+            if not await loop.run_in_executor(mt5_thread, connect_mt5):
+                await asyncio.sleep(10)
+                continue
+
+            load_ai_model_async()
+            await loop.run_in_executor(None, api_discovery.join)
+
+            try:
+                await tick_loop(queue, mt5_thread)
+            except Exception as e:
+                metrics.count("reconnects")
+                logger.error(f"Bridge loop error: {e}. Re-initializing in 5s...")
+                await loop.run_in_executor(mt5_thread, mt5.shutdown)
+                await asyncio.sleep(5)
+    finally:
+        publish_task.cancel()
+        mt5_thread.submit(mt5.shutdown)
+        mt5_thread.shutdown(wait=True)
+        http_thread.shutdown(wait=False)
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="MT5 -> dashboard bridge")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="asyncio mode: fixed tick cadence, non-blocking publishing with stale-tick dropping")
+    parser.add_argument("--stream", action="store_true",
+                        help="serve every tick as Server-Sent Events on BRIDGE_STREAM_PORT (default 8766)")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL,
+                        help="seconds between MT5 polls (e.g. 0.25 with --stream)")
+    parser.add_argument("--symbols", default=",".join(SYMBOLS),
+                        help=f"comma separated symbols tracked by one scheduler (the first is the primary, default {SYMBOL})")
+    parser.add_argument("--timeframes", default=",".join(TIMEFRAMES),
+                        help="comma separated timeframes synced to /api/history for every symbol (e.g. M1,M5,M15,H1)")
+    parser.add_argument("--metrics-file", default="bridge_metrics.json",
+                        help="JSON snapshot of stage latencies (p50/p95/p99) and counters, rewritten periodically ('' to disable)")
+    parser.add_argument("--metrics-interval", type=float, default=metrics.SNAPSHOT_INTERVAL)
+    args = parser.parse_args()
+
+    POLL_INTERVAL = args.poll_interval
+    SYMBOLS = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    SYMBOL = SYMBOLS[0]
+    set_symbols(SYMBOLS)
+    TIMEFRAMES = {tf.strip(): getattr(mt5, f"TIMEFRAME_{tf.strip()}") for tf in args.timeframes.split(",") if tf.strip()}
+    if args.stream:
+        tick_stream = TickStream().start()
+    if args.metrics_file:
+        metrics.registry.start_snapshots(args.metrics_file, args.metrics_interval)
+
+    if args.use_async:
+        asyncio.run(run_async())
+    else:
+        main()
@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import logging
+import numpy as np
+from datetime import datetime, timezone
+
+try:
+    import MetaTrader5 as mt5
+except ImportError: # Linux boxes: serve cached bars only
+    mt5 = None
+
+logger = logging.getLogger(__name__)
+
+# Historical bars cached on disk as one .npy file per symbol/timeframe/month
+# (data_cache/XAUUSD/M15/2025-01.npy), memory-mapped on read. Months that are
+# over are fetched from MT5 once; the current month is topped up incrementally.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_cache")
+
+# Bar times are broker server time (usually UTC+2/+3): a month only counts as
+# finished once it is over by this margin
+SERVER_TIME_SLACK = 86400
+
+# A fetch only covers a partition when it starts this close to the partition
+# start (weekend and holiday closes aside); an empty or truncated answer, e.g.
+# while the terminal is still syncing history, is refetched on the next call
+MONTH_START_GAP = 4 * 86400
+DAY_START_GAP = 6 * 3600
+
+def mt5_timeframe(timeframe_str):
+    return getattr(mt5, f"TIMEFRAME_{timeframe_str}")
+
+def _month_bounds(year, month):
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + (month == 12), month % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp()), int(end.timestamp())
+
+def _months(start_ts, end_ts):
+    """(year, month) partitions overlapping [start_ts, end_ts)"""
+    d = datetime.fromtimestamp(start_ts, tz=timezone.utc)
+    year, month = d.year, d.month
+    while _month_bounds(year, month)[0] < end_ts:
+        yield year, month
+        year, month = year + (month == 12), month % 12 + 1
+
+def _to_ts(dt):
+    if isinstance(dt, (int, float, np.integer)):
+        return int(dt)
+    if dt.tzinfo is None: # Naive datetimes are UTC, like the MT5 bar times
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, "manifest.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(directory, manifest):
+    path = os.path.join(directory, "manifest.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def _save_array(path, arr):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, arr)
+    os.replace(path + ".tmp", path)
+
+class BarProvider:
+    """Range queries over cached MT5 bars, filling gaps from MT5 when it is connected"""
+
+    def __init__(self, cache_dir=CACHE_DIR, online=True):
+        self.cache_dir = cache_dir
+        self.online = online and mt5 is not None
+
+    def _dir(self, symbol, timeframe_str):
+        return os.path.join(self.cache_dir, symbol, timeframe_str)
+
+    def _load_manifest(self, symbol, timeframe_str):
+        return _load_manifest(self._dir(symbol, timeframe_str))
+
+    def _save_manifest(self, symbol, timeframe_str, manifest):
+        _save_manifest(self._dir(symbol, timeframe_str), manifest)
+
+    def _fetch(self, symbol, timeframe_str, start_ts, end_ts):
+        """Bars with start_ts <= time < end_ts from MT5 (None on error)"""
+        rates = mt5.copy_rates_range(
+            symbol, mt5_timeframe(timeframe_str),
+            datetime.fromtimestamp(start_ts, tz=timezone.utc),
+            datetime.fromtimestamp(end_ts - 1, tz=timezone.utc)
+        )
+        if rates is None:
+            logger.warning(f"MT5 fetch failed for {symbol} [{timeframe_str}]: {mt5.last_error()}")
+            return None
+        return rates[(rates['time'] >= start_ts) & (rates['time'] < end_ts)]
+
+    def _month(self, symbol, timeframe_str, year, month, manifest):
+        """Cached bars of one month (memory-mapped), topped up from MT5 if incomplete"""
+        key = f"{year:04d}-{month:02d}"
+        path = os.path.join(self._dir(symbol, timeframe_str), key + ".npy")
+        meta = manifest.get(key, {})
+        # Finished months are immutable and memory-mapped; the current one is small and gets rewritten
+        mmap_mode = 'r' if meta.get("complete") else None
+        cached = np.load(path, mmap_mode=mmap_mode) if os.path.exists(path) else None
+
+        if meta.get("complete") or not self.online:
+            return cached, False
+
+        month_start, month_end = _month_bounds(year, month)
+        now = int(time.time())
+        if month_start > now + SERVER_TIME_SLACK:
+            return cached, False
+
+        # Only fetch bars after the last cached one (the last one may still be forming),
+        # unless the cached bars don't reach back to the start of the month
+        has_start = cached is not None and len(cached) and int(cached['time'][0]) - month_start <= MONTH_START_GAP
+        fetch_from = int(cached['time'][-1]) if has_start else month_start
+        fresh = self._fetch(symbol, timeframe_str, fetch_from, month_end)
+        if fresh is None:
+            return cached, False
+
+        if cached is not None and len(cached):
+            merged = np.concatenate([cached[cached['time'] < fetch_from], fresh])
+        else:
+            merged = fresh
+
+        _save_array(path, merged)
+
+        covered = len(fresh) > 0 and int(merged['time'][0]) - month_start <= MONTH_START_GAP
+        complete = covered and month_end + SERVER_TIME_SLACK <= now
+        manifest[key] = {"complete": complete, "bars": int(len(merged))}
+        return (np.load(path, mmap_mode='r') if complete else merged), True
+
+    def get_rates(self, symbol, timeframe_str, start, end):
+        """MT5-style rates with start <= time < end (datetimes or epoch seconds).
+
+        A range inside one month is a read-only view on the memory-mapped file.
+        Returns None when nothing is cached and MT5 can't provide it.
+        """
+        start_ts, end_ts = _to_ts(start), _to_ts(end)
+        manifest = self._load_manifest(symbol, timeframe_str)
+        changed = False
+
+        parts = []
+        for year, month in _months(start_ts, end_ts):
+            bars, updated = self._month(symbol, timeframe_str, year, month, manifest)
+            changed |= updated
+            if bars is None or len(bars) == 0:
+                continue
+            times = bars['time']
+            lo, hi = np.searchsorted(times, [start_ts, end_ts])
+            if hi > lo:
+                parts.append(bars[lo:hi])
+
+        if changed:
+            self._save_manifest(symbol, timeframe_str, manifest)
+
+        if not parts:
+            return None
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def get_last_bars(self, symbol, timeframe_str, count, max_empty_months=3):
+        """Latest `count` bars (like copy_rates_from_pos(symbol, tf, 0, count)), walking months backwards"""
+        now = int(time.time())
+        d = datetime.fromtimestamp(now, tz=timezone.utc)
+        year, month = d.year, d.month
+        manifest = self._load_manifest(symbol, timeframe_str)
+        changed = False
+
+        parts, total, empty = [], 0, 0
+        while total < count and empty < max_empty_months:
+            bars, updated = self._month(symbol, timeframe_str, year, month, manifest)
+            changed |= updated
+            if bars is None or len(bars) == 0:
+                empty += 1
+            else:
+                empty = 0
+                parts.append(bars)
+                total += len(bars)
+            year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+        if changed:
+            self._save_manifest(symbol, timeframe_str, manifest)
+
+        if not parts:
+            return None
+        parts.reverse()
+        rates = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return rates[-count:]
+
+
+# Ticks are cached per day (data_cache/ticks/XAUUSD/2025-01-06.npy) in a compact
+# time/bid/ask layout and read back as fixed-size chunks, so replaying months
+# of ticks never needs more than one chunk in memory.
+TICK_DTYPE = np.dtype([("time_msc", np.int64), ("bid", np.float64), ("ask", np.float64)])
+CHUNK_TICKS = 1_000_000
+
+def compact_ticks(ticks):
+    """MT5 tick array -> TICK_DTYPE, dropping ticks without a two-sided quote"""
+    ticks = ticks[(ticks['bid'] > 0) & (ticks['ask'] > 0)]
+    out = np.empty(len(ticks), dtype=TICK_DTYPE)
+    out['time_msc'] = ticks['time_msc']
+    out['bid'] = ticks['bid']
+    out['ask'] = ticks['ask']
+    return out
+
+class TickProvider:
+    """Chunked tick reads over the daily tick cache, filling missing days from MT5 when connected"""
+
+    def __init__(self, cache_dir=CACHE_DIR, online=True):
+        self.cache_dir = cache_dir
+        self.online = online and mt5 is not None
+
+    def _dir(self, symbol):
+        return os.path.join(self.cache_dir, "ticks", symbol)
+
+    def _day(self, symbol, day_ts, manifest):
+        key = datetime.fromtimestamp(day_ts, tz=timezone.utc).strftime("%Y-%m-%d")
+        path = os.path.join(self._dir(symbol), key + ".npy")
+        if manifest.get(key, {}).get("complete") or not self.online:
+            return (np.load(path, mmap_mode='r') if os.path.exists(path) else None), False
+
+        now = int(time.time())
+        if day_ts > now + SERVER_TIME_SLACK:
+            return None, False
+
+        ticks = mt5.copy_ticks_range(
+            symbol,
+            datetime.fromtimestamp(day_ts, tz=timezone.utc),
+            datetime.fromtimestamp(day_ts + 86400, tz=timezone.utc),
+            mt5.COPY_TICKS_ALL
+        )
+        if ticks is None:
+            logger.warning(f"MT5 tick fetch failed for {symbol} {key}: {mt5.last_error()}")
+            return (np.load(path, mmap_mode='r') if os.path.exists(path) else None), False
+
+        ticks = compact_ticks(ticks)
+        ticks = ticks[ticks['time_msc'] < (day_ts + 86400) * 1000]
+        _save_array(path, ticks)
+        covered = len(ticks) > 0 and int(ticks['time_msc'][0]) // 1000 - day_ts <= DAY_START_GAP
+        manifest[key] = {"complete": covered and day_ts + 86400 + SERVER_TIME_SLACK <= now, "ticks": int(len(ticks))}
+        return np.load(path, mmap_mode='r'), True
+
+    def iter_chunks(self, symbol, start, end, chunk_size=CHUNK_TICKS):
+        """Yields TICK_DTYPE arrays (at most chunk_size ticks, views where possible) with start <= time < end"""
+        start_ms, end_ms = _to_ts(start) * 1000, _to_ts(end) * 1000
+        manifest = _load_manifest(self._dir(symbol))
+
+        day_ts = start_ms // 1000 // 86400 * 86400
+        while day_ts * 1000 < end_ms:
+            ticks, updated = self._day(symbol, day_ts, manifest)
+            if updated:
+                _save_manifest(self._dir(symbol), manifest)
+            day_ts += 86400
+            if ticks is None or len(ticks) == 0:
+                continue
+
+            lo, hi = np.searchsorted(ticks['time_msc'], [start_ms, end_ms])
+            for i in range(lo, hi, chunk_size):
+                yield ticks[i:min(hi, i + chunk_size)]
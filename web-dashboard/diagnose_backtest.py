@@ -1,23 +1,28 @@
-import MetaTrader5 as mt5
+try:
+    import MetaTrader5 as mt5
+except ImportError:
+    mt5 = None
 import pandas as pd
 from datetime import datetime
+from data_provider import BarProvider
 from strategy_v2 import calc_indicators, analyze_breakout, is_ny_session
 
 def diagnose():
-    if not mt5.initialize():
-        print("MT5 Init Failed")
-        return
+    online = mt5 is not None and mt5.initialize()
+    if not online:
+        print("MT5 Init Failed, using cached bars only")
 
     symbol = "XAUUSD"
     start_dt = datetime(2025, 1, 1)
     end_dt = datetime(2026, 1, 1)
     
     print(f"Diagnostics: Fetching {symbol} M15 from {start_dt} to {end_dt}")
-    rates = mt5.copy_rates_range(symbol, mt5.TIMEFRAME_M15, start_dt, end_dt)
+    rates = BarProvider(online=online).get_rates(symbol, "M15", start_dt, end_dt)
+    if online:
+        mt5.shutdown()
     
     if rates is None or len(rates) == 0:
         print("No data found!")
-        mt5.shutdown()
         return
 
     df = pd.DataFrame(rates)
@@ -39,7 +44,5 @@ def diagnose():
                 count += 1
         print(f"Signals with Volume Ratio > {t}: {count}")
 
-    mt5.shutdown()
-
 if __name__ == "__main__":
     diagnose()
@@ -0,0 +1,427 @@
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+import numpy as np
+import indicators
+from data_provider import CACHE_DIR
+
+# Declarative feature pipeline of the signal model, shared by training and live
+# inference. Each feature computes a whole column at once (batch: training,
+# backfills) and steps one bar at a time from a small immutable state
+# (incremental: live bars, appends). Both modes give the same values, and a
+# batch run also returns the state after its last bar, so a stream can pick up
+# where it ended.
+#
+# Computed columns persist in FeatureStore (data_cache/features/<symbol>/<tf>/<pipeline id>/),
+# one raw little-endian file per column plus the bar times, appended in place;
+# the manifest holds the row count and the stream state after the last row.
+
+# VWAP sessions start at this broker server hour (MT5 bar times are server time)
+SESSION_RESET_HOUR = 0
+STORE_DIR = os.path.join(CACHE_DIR, "features")
+
+def _times(rates):
+    """Bar times as int64 epoch seconds (MT5 rates or a DataFrame with datetime times)"""
+    times = np.asarray(rates['time'])
+    if np.issubdtype(times.dtype, np.datetime64):
+        return times.astype('datetime64[s]').astype(np.int64)
+    return times.astype(np.int64)
+
+def _column(rates, field):
+    return np.asarray(rates[field], dtype=np.float64)
+
+# --- Features ---
+# batch(rates, cache_key) -> column, end_state(rates, column) -> state after the last bar,
+# step(state, bar) -> (state after bar, value), bar = (time, high, low, close, volume).
+# States are tuples (or None before the first bar) and are never mutated.
+
+class Feature:
+    def __init__(self, **params):
+        self.params = params
+
+    def __repr__(self):
+        return f"{type(self).__name__.lower()}({', '.join(f'{k}={v}' for k, v in sorted(self.params.items()))})"
+
+class Ema(Feature):
+    def __init__(self, span):
+        super().__init__(span=span)
+        self.alpha = 2 / (span + 1)
+
+    def batch(self, rates, cache_key):
+        return indicators.compute("ema", rates, span=self.params["span"], **cache_key)
+
+    def end_state(self, rates, column):
+        return float(column[-1]) if len(column) else None
+
+    def step(self, state, bar):
+        close = bar[3]
+        value = close if state is None else (1 - self.alpha) * state + self.alpha * close
+        return value, value
+
+def _window_mean(buf, value, window):
+    """Mean of the last `window` values of buf + (value,) (NaN if fewer); the same sum as the rolling mean"""
+    if len(buf) + 1 < window:
+        return np.nan
+    return (sum(buf[-(window - 1):] if window > 1 else ()) + value) / window
+
+class Rsi(Feature):
+    """Rolling-mean RSI (indicators.rsi); state: (prev close, last period - 1 gains, losses)"""
+
+    def __init__(self, period=14):
+        super().__init__(period=period)
+
+    def batch(self, rates, cache_key):
+        return indicators.compute("rsi", rates, period=self.params["period"], **cache_key)
+
+    def end_state(self, rates, column):
+        close = _column(rates, 'close')
+        if len(close) == 0:
+            return None
+        keep = self.params["period"] - 1
+        delta = np.concatenate([[0.0], np.diff(close)])[-keep:] if keep else np.empty(0) # The first delta counts as neither
+        return float(close[-1]), tuple(np.maximum(delta, 0.0).tolist()), tuple(np.maximum(-delta, 0.0).tolist())
+
+    def step(self, state, bar):
+        period, close = self.params["period"], bar[3]
+        if state is None:
+            prev, gains, losses, gain, loss = None, (), (), 0.0, 0.0
+        else:
+            prev, gains, losses = state
+            gain, loss = max(close - prev, 0.0), max(prev - close, 0.0)
+        avg_gain, avg_loss = _window_mean(gains, gain, period), _window_mean(losses, loss, period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = 100 - 100 / (1 + np.float64(avg_gain) / np.float64(avg_loss))
+        keep = period - 1
+        return (close, (gains + (gain,))[-keep:] if keep else (), (losses + (loss,))[-keep:] if keep else ()), float(value)
+
+class Atr(Feature):
+    """Rolling-mean ATR (indicators.atr); state: (prev close, last period - 1 true ranges)"""
+
+    def __init__(self, period=14):
+        super().__init__(period=period)
+
+    def batch(self, rates, cache_key):
+        return indicators.compute("atr", rates, period=self.params["period"], **cache_key)
+
+    def end_state(self, rates, column):
+        if len(rates) == 0:
+            return None
+        keep = self.params["period"] - 1
+        tr = indicators.true_range(rates['high'], rates['low'], rates['close'])
+        return float(_column(rates, 'close')[-1]), tuple(tr[-keep:].tolist()) if keep else ()
+
+    def step(self, state, bar):
+        period, (_, high, low, close, _) = self.params["period"], bar
+        if state is None:
+            trs, true_range = (), high - low
+        else:
+            prev, trs = state
+            true_range = max(high - low, abs(high - prev), abs(low - prev))
+        keep = period - 1
+        return (close, (trs + (true_range,))[-keep:] if keep else ()), _window_mean(trs, true_range, period)
+
+class SessionVwapDist(Feature):
+    """Distance of the close from the session VWAP, in percent; state: (session, cum price x volume, cum volume)"""
+
+    def __init__(self, reset_hour=SESSION_RESET_HOUR):
+        super().__init__(reset_hour=reset_hour)
+
+    def _sessions(self, times):
+        return (times - self.params["reset_hour"] * 3600) // 86400
+
+    def _cumulative(self, rates):
+        high, low, close, volume = (_column(rates, f) for f in ('high', 'low', 'close', 'tick_volume'))
+        pv = (high + low + close) / 3 * volume
+        sessions = self._sessions(_times(rates))
+        cum_pv, cum_v = np.empty_like(pv), np.empty_like(volume)
+        starts = np.flatnonzero(np.r_[True, sessions[1:] != sessions[:-1]]) if len(sessions) else []
+        for lo, hi in zip(starts, list(starts[1:]) + [len(pv)]):
+            # Sequential sums per session: the same additions as the incremental path
+            np.cumsum(pv[lo:hi], out=cum_pv[lo:hi])
+            np.cumsum(volume[lo:hi], out=cum_v[lo:hi])
+        return sessions, cum_pv, cum_v
+
+    def batch(self, rates, cache_key):
+        _, cum_pv, cum_v = self._cumulative(rates)
+        close = _column(rates, 'close')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = np.where(cum_v != 0, cum_pv / cum_v, np.nan)
+            return (close - vwap) / vwap * 100
+
+    def end_state(self, rates, column):
+        if len(rates) == 0:
+            return None
+        sessions, cum_pv, cum_v = self._cumulative(rates)
+        return int(sessions[-1]), float(cum_pv[-1]), float(cum_v[-1])
+
+    def step(self, state, bar):
+        t, high, low, close, volume = bar
+        session = int(self._sessions(t))
+        pv = (high + low + close) / 3 * volume
+        if state is not None and state[0] == session:
+            pv, volume = state[1] + pv, state[2] + volume
+        vwap = pv / volume if volume else np.nan
+        return (session, pv, volume), (close - vwap) / vwap * 100
+
+class Hour(Feature):
+    def batch(self, rates, cache_key):
+        return ((_times(rates) // 3600) % 24).astype(np.float64)
+
+    def end_state(self, rates, column):
+        return None
+
+    def step(self, state, bar):
+        return None, float((int(bar[0]) // 3600) % 24)
+
+class Close(Feature):
+    def batch(self, rates, cache_key):
+        return _column(rates, 'close').copy()
+
+    def end_state(self, rates, column):
+        return None
+
+    def step(self, state, bar):
+        return None, bar[3]
+
+# --- Pipeline ---
+class FeaturePipeline:
+    def __init__(self, features):
+        self.features = list(features) # [(column, Feature)] in output order
+        self.columns = [name for name, _ in self.features]
+        self.signature = ";".join(f"{name}={feature!r}" for name, feature in self.features)
+        self.id = f"{zlib.crc32(self.signature.encode()):08x}" # Store directory: a changed pipeline never reads old columns
+
+    def batch(self, rates, symbol=None, timeframe=None, with_state=False):
+        """(n, k) feature matrix over `rates` (oldest first); with_state also returns a FeatureState after the last bar"""
+        cache_key = {"symbol": symbol, "timeframe": timeframe}
+        X = np.empty((len(rates), len(self.features)), dtype=np.float64)
+        for i, (_, feature) in enumerate(self.features):
+            X[:, i] = feature.batch(rates, cache_key)
+        if not with_state:
+            return X
+        state = FeatureState(self)
+        if len(rates):
+            state.states = [feature.end_state(rates, X[:, i]) for i, (_, feature) in enumerate(self.features)]
+            state.last_time = int(_times(rates)[-1])
+        return X, state
+
+class FeatureState:
+    """Incremental mode of a pipeline: O(1) per closed bar, the forming bar evaluated without changing the state.
+
+    Seeded with the same bars a batch run sees, the vector of the newest bar
+    (pipeline column order) matches the batch row for it.
+    """
+
+    def __init__(self, pipeline=None):
+        self.pipeline = pipeline or PIPELINE
+        self.reset()
+
+    def reset(self):
+        self.last_time = None # Time of the last committed (closed) bar
+        self.states = [None] * len(self.pipeline.features)
+
+    @staticmethod
+    def _bar(rate):
+        return int(rate['time']), float(rate['high']), float(rate['low']), float(rate['close']), float(rate['tick_volume'])
+
+    def _step(self, rate):
+        bar = self._bar(rate)
+        stepped = [feature.step(state, bar) for (_, feature), state in zip(self.pipeline.features, self.states)]
+        return [s for s, _ in stepped], np.array([v for _, v in stepped], dtype=np.float64)
+
+    def _commit(self, rate):
+        self.states, values = self._step(rate)
+        self.last_time = int(rate['time'])
+        return values
+
+    def seed(self, rates):
+        """Rebuilds the state from MT5 rates (oldest first); returns the newest bar's features"""
+        self.reset()
+        return self.update(rates)
+
+    def update(self, rates):
+        """Commits the closed bars after the last committed one and returns the features of the newest bar"""
+        if rates is None or len(rates) == 0:
+            return None
+        for rate in rates[:-1]:
+            if self.last_time is None or int(rate['time']) > self.last_time:
+                self._commit(rate)
+        return self._step(rates[-1])[1]
+
+    def extend(self, rates):
+        """Commits every bar of `rates` (closed, oldest first) and returns their feature rows"""
+        rows = np.empty((len(rates), len(self.pipeline.features)), dtype=np.float64)
+        for i, rate in enumerate(rates):
+            rows[i] = self._commit(rate)
+        return rows
+
+    def to_dict(self):
+        return {"signature": self.pipeline.signature, "last_time": self.last_time, "states": self.states}
+
+    def load_dict(self, data):
+        if data["signature"] != self.pipeline.signature:
+            raise ValueError("feature state was saved by a different pipeline")
+        self.reset()
+        self.last_time = data["last_time"]
+        # JSON turns the state tuples into lists
+        self.states = [_tuples(s) for s in data["states"]]
+
+def _tuples(value):
+    return tuple(_tuples(v) for v in value) if isinstance(value, list) else value
+
+# Features of the signal model (ai_engine.FEATURE_COLS)
+PIPELINE = FeaturePipeline([
+    ("EMA_20", Ema(20)),
+    ("EMA_50", Ema(50)),
+    ("EMA_200", Ema(200)),
+    ("RSI_14", Rsi(14)),
+    ("ATR_14", Atr(14)),
+    ("vwap_dist", SessionVwapDist()),
+    ("hour", Hour()),
+    ("close", Close()),
+])
+
+# --- Store ---
+class FeatureStore:
+    """Persistent columns of one pipeline, keyed by symbol, timeframe and bar time (closed bars only)"""
+
+    def __init__(self, pipeline=None, store_dir=STORE_DIR):
+        self.pipeline = pipeline or PIPELINE
+        self.store_dir = store_dir
+
+    def _dir(self, symbol, timeframe_str):
+        return os.path.join(self.store_dir, symbol, timeframe_str, self.pipeline.id)
+
+    def _path(self, symbol, timeframe_str, column):
+        return os.path.join(self._dir(symbol, timeframe_str), f"{column}.i64" if column == "time" else f"{column}.f64")
+
+    def manifest(self, symbol, timeframe_str):
+        try:
+            with open(os.path.join(self._dir(symbol, timeframe_str), "manifest.json")) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("signature") == self.pipeline.signature else None
+
+    def _save_manifest(self, symbol, timeframe_str, manifest):
+        path = os.path.join(self._dir(symbol, timeframe_str), "manifest.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(path + ".tmp", path)
+
+    def state(self, symbol, timeframe_str):
+        """FeatureState after the last stored bar (None for an empty store)"""
+        manifest = self.manifest(symbol, timeframe_str)
+        if manifest is None:
+            return None
+        state = FeatureState(self.pipeline)
+        state.load_dict(manifest["state"])
+        return state
+
+    def _write(self, symbol, timeframe_str, times, X, state, rows_before, first_time=None):
+        """Appends rows after the first `rows_before` (anything past them is a torn append) and commits the manifest"""
+        os.makedirs(self._dir(symbol, timeframe_str), exist_ok=True)
+        columns = [("time", np.asarray(times, dtype='<i8'))] + [(c, X[:, i].astype('<f8')) for i, c in enumerate(self.pipeline.columns)]
+        for column, values in columns:
+            with open(self._path(symbol, timeframe_str, column), "r+b" if rows_before else "wb") as f:
+                f.truncate(rows_before * 8)
+                f.seek(rows_before * 8)
+                f.write(values.tobytes())
+        self._save_manifest(symbol, timeframe_str, {
+            "signature": self.pipeline.signature, "columns": self.pipeline.columns,
+            "rows": rows_before + len(times), "first_time": int(times[0]) if first_time is None else first_time,
+            "last_time": int(times[-1]), "state": state.to_dict(), "updated": time.time(),
+        })
+
+    def rebuild(self, symbol, timeframe_str, rates):
+        """Replaces the columns with a batch run over `rates` (closed bars, oldest first)"""
+        X, state = self.pipeline.batch(rates, with_state=True)
+        if len(rates):
+            self._write(symbol, timeframe_str, _times(rates), X, state, 0)
+        return len(rates)
+
+    def append(self, symbol, timeframe_str, rates):
+        """Steps the stored state through the bars of `rates` newer than the last stored one; returns how many"""
+        manifest = self.manifest(symbol, timeframe_str)
+        if manifest is None:
+            return self.rebuild(symbol, timeframe_str, rates)
+        rates = rates[_times(rates) > manifest["last_time"]]
+        if len(rates) == 0:
+            return 0
+        state = self.state(symbol, timeframe_str)
+        X = state.extend(rates)
+        self._write(symbol, timeframe_str, _times(rates), X, state, manifest["rows"], manifest["first_time"])
+        return len(rates)
+
+    def sync(self, symbol, timeframe_str, provider, min_rows, rebuild=False):
+        """Brings the store up to the last closed bar of `provider` (a BarProvider) with at least min_rows rows.
+
+        Appends the new bars incrementally; an empty/short store (or rebuild)
+        is recomputed in batch from the last min_rows bars. Returns the rows
+        added, or None when no bars could be loaded.
+        """
+        manifest = self.manifest(symbol, timeframe_str)
+        if rebuild or manifest is None or manifest["rows"] < min_rows:
+            rates = provider.get_last_bars(symbol, timeframe_str, min_rows + 1)
+            return None if rates is None else self.rebuild(symbol, timeframe_str, rates[:-1]) # The newest bar is still forming
+        rates = provider.get_rates(symbol, timeframe_str, manifest["last_time"] + 1, int(time.time()) + 86400)
+        if rates is None:
+            return 0
+        return self.append(symbol, timeframe_str, rates[:-1])
+
+    def read(self, symbol, timeframe_str, start=None, end=None, last=None, columns=None):
+        """(times, X) with start <= time < end (epoch seconds), limited to the `last` rows.
+
+        times is a read-only view on the memory-mapped column; X gathers the
+        requested columns (pipeline order by default) into a (rows, k) array,
+        reading only the selected range. Empty arrays when nothing is stored.
+        """
+        columns = columns or self.pipeline.columns
+        manifest = self.manifest(symbol, timeframe_str)
+        rows = manifest["rows"] if manifest else 0
+        if rows == 0:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(columns)), dtype=np.float64)
+        times = np.memmap(self._path(symbol, timeframe_str, "time"), dtype='<i8', mode='r', shape=(rows,))
+        lo, hi = 0, rows
+        if last is not None:
+            lo = max(0, rows - last)
+        if start is not None:
+            lo = max(lo, int(np.searchsorted(times, start)))
+        if end is not None:
+            hi = int(np.searchsorted(times, end))
+        hi = max(lo, hi)
+        X = np.column_stack([
+            np.memmap(self._path(symbol, timeframe_str, c), dtype='<f8', mode='r', shape=(rows,))[lo:hi] for c in columns
+        ]) if hi > lo else np.empty((0, len(columns)), dtype=np.float64)
+        return times[lo:hi], X
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build/inspect the stored signal-model features")
+    parser.add_argument("symbol", nargs="?", default="XAUUSD")
+    parser.add_argument("timeframe", nargs="?", default="M5")
+    parser.add_argument("--sync", type=int, metavar="BARS", help="update the store first (at least BARS rows)")
+    parser.add_argument("--rebuild", action="store_true", help="with --sync: recompute in batch instead of appending")
+    parser.add_argument("--offline", action="store_true", help="with --sync: cached bars only")
+    parser.add_argument("--tail", type=int, default=5, help="rows to print")
+    args = parser.parse_args()
+
+    store = FeatureStore()
+    if args.sync:
+        from data_provider import BarProvider
+        online = False
+        if not args.offline:
+            from data_provider import mt5
+            online = mt5 is not None and mt5.initialize()
+        added = store.sync(args.symbol, args.timeframe, BarProvider(online=online), args.sync, rebuild=args.rebuild)
+        print(f"{added} rows added", file=sys.stderr)
+
+    manifest = store.manifest(args.symbol, args.timeframe)
+    times, X = store.read(args.symbol, args.timeframe, last=args.tail)
+    json.dump({
+        "pipeline": PIPELINE.signature,
+        "store": {k: v for k, v in manifest.items() if k != "state"} if manifest else None,
+        "tail": [dict(time=int(t), **dict(zip(PIPELINE.columns, map(float, row)))) for t, row in zip(times, X)],
+    }, sys.stdout, indent=2, default=str)
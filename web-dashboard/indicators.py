@@ -0,0 +1,148 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+
+# Shared indicator kernels for the bridge, trainer and backtester.
+# Kernels take plain arrays (MT5 rates fields work as-is) and return float64 arrays.
+# Recursive/rolling windows use pandas' compiled routines on a zero-copy Series,
+# so values match the old DataFrame helpers exactly. pandas is imported on the
+# first such call; the live bridge only needs the streaming state, not pandas.
+
+CACHE_SIZE = 128 # Max memoized indicator arrays (LRU)
+
+_cache = OrderedDict()
+_cache_stats = {"hits": 0, "misses": 0}
+_cache_lock = threading.Lock() # The backtest service computes on several request threads
+
+def _values(x):
+    return np.asarray(x, dtype=np.float64)
+
+def rolling_mean(values, window):
+    import pandas as pd
+    return pd.Series(_values(values), copy=False).rolling(window=window).mean().to_numpy()
+
+def rolling_max(values, window):
+    import pandas as pd
+    return pd.Series(_values(values), copy=False).rolling(window=window).max().to_numpy()
+
+def rolling_min(values, window):
+    import pandas as pd
+    return pd.Series(_values(values), copy=False).rolling(window=window).min().to_numpy()
+
+def ema(values, span):
+    import pandas as pd
+    return pd.Series(_values(values), copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+
+def rsi(values, period=14):
+    values = _values(values)
+    if len(values) == 0:
+        return values.copy()
+    delta = np.empty_like(values)
+    delta[0] = np.nan
+    np.subtract(values[1:], values[:-1], out=delta[1:])
+    gain = rolling_mean(np.where(delta > 0, delta, 0.0), period)
+    loss = rolling_mean(np.where(delta < 0, -delta, 0.0), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
+        return 100 - (100 / (1 + rs))
+
+def true_range(high, low, close):
+    high, low, close = _values(high), _values(low), _values(close)
+    tr = high - low
+    if len(tr) > 1:
+        prev_close = close[:-1]
+        np.maximum(tr[1:], np.abs(high[1:] - prev_close), out=tr[1:])
+        np.maximum(tr[1:], np.abs(low[1:] - prev_close), out=tr[1:])
+    return tr
+
+def atr(high, low, close, period=14):
+    return rolling_mean(true_range(high, low, close), period)
+
+def breakout_columns(rates, vol_window=20, atr_period=14, range_window=16):
+    """Columns used by the Institutional Breakout strategy (see strategy_v2.calc_indicators)"""
+    volume = _values(rates['tick_volume'])
+    vol_avg = rolling_mean(volume, vol_window)
+    return {
+        "vol_avg_20": vol_avg,
+        "volume_ratio": volume / vol_avg,
+        "ATR_14": atr(rates['high'], rates['low'], rates['close'], atr_period),
+        "h4_high": rolling_max(rates['high'], range_window),
+        "h4_low": rolling_min(rates['low'], range_window),
+    }
+
+KERNELS = {
+    "ema": lambda rates, span, field='close': ema(rates[field], span),
+    "rsi": lambda rates, period=14, field='close': rsi(rates[field], period),
+    "atr": lambda rates, period=14: atr(rates['high'], rates['low'], rates['close'], period),
+    "breakout": breakout_columns,
+}
+
+def _last_time(rates):
+    """Last bar time as epoch seconds (MT5 rates, or a DataFrame with a time column/index)"""
+    import pandas as pd
+    if isinstance(rates, pd.DataFrame):
+        times = rates['time'] if 'time' in rates.columns else rates.index
+        last = times.iloc[-1] if isinstance(times, pd.Series) else times[-1]
+    else:
+        last = rates['time'][-1]
+    return int(last) if isinstance(last, (int, np.integer)) else int(pd.Timestamp(last).timestamp())
+
+ROW_FIELDS = ('open', 'high', 'low', 'close', 'tick_volume')
+
+def _last_row(rates):
+    """OHLCV of the last bar: the forming bar keeps its time and the bar count while these change"""
+    names = rates.dtype.names if isinstance(rates, np.ndarray) else rates.columns
+    return tuple(float(np.asarray(rates[f])[-1]) for f in ROW_FIELDS if f in names)
+
+def compute(name, rates, symbol=None, timeframe=None, **params):
+    """Runs a named kernel over raw rates, memoized by (symbol, timeframe, last bar time and OHLCV, bars, params).
+
+    Without a symbol the result is computed but not cached. Cached arrays are
+    shared between callers and therefore read-only.
+    """
+    kernel = KERNELS[name]
+    if symbol is None or len(rates) == 0:
+        return kernel(rates, **params)
+
+    key = (symbol, timeframe, _last_time(rates), _last_row(rates), len(rates), name, tuple(sorted(params.items())))
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+            return result
+        _cache_stats["misses"] += 1
+
+    result = kernel(rates, **params)
+    for arr in (result.values() if isinstance(result, dict) else [result]):
+        arr.setflags(write=False)
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+        _cache_stats.update(hits=0, misses=0)
+
+def cache_info():
+    with _cache_lock:
+        return {"size": len(_cache), "max_size": CACHE_SIZE, **_cache_stats}
+
+if __name__ == "__main__":
+    # Regression check: revising the forming (last) bar must not return the memoized columns of its old version
+    from synthetic_data import generate_bars
+    rates = generate_bars(2000, "M15", seed=7)
+    first = {k: v[-1] for k, v in compute("breakout", rates, symbol="XAUUSD", timeframe="M15").items()}
+    revised = rates.copy()
+    revised['high'][-1] += 5.0
+    revised['close'][-1] += 4.0
+    revised['tick_volume'][-1] *= 4
+    cached = {k: v[-1] for k, v in compute("breakout", revised, symbol="XAUUSD", timeframe="M15").items()}
+    fresh = {k: v[-1] for k, v in breakout_columns(revised).items()}
+    stale = [k for k in fresh if not np.isclose(cached[k], fresh[k], equal_nan=True)]
+    changed = [k for k in fresh if not np.isclose(first[k], fresh[k], equal_nan=True)]
+    print(f"revised last bar: changed {changed}, stale {stale}, {cache_info()}")
+    raise SystemExit(1 if stale or not changed else 0)
@@ -32,9 +32,34 @@ export function initDB() {
       low REAL,
       close REAL,
       volume REAL,
-      PRIMARY KEY (time, timeframe)
+      symbol TEXT NOT NULL DEFAULT 'XAUUSD',
+      PRIMARY KEY (symbol, time, timeframe)
     );
   `);
+
+  // Databases from before the multi-symbol bridge: rebuild candles with the symbol in the key
+  const columns = db.prepare('PRAGMA table_info(candles)').all() as { name: string }[];
+  if (!columns.some((c) => c.name === 'symbol')) {
+    db.exec(`
+      BEGIN;
+      CREATE TABLE candles_new (
+        time INTEGER,
+        timeframe TEXT,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        symbol TEXT NOT NULL DEFAULT 'XAUUSD',
+        PRIMARY KEY (symbol, time, timeframe)
+      );
+      INSERT INTO candles_new (time, timeframe, open, high, low, close, volume)
+        SELECT time, timeframe, open, high, low, close, volume FROM candles;
+      DROP TABLE candles;
+      ALTER TABLE candles_new RENAME TO candles;
+      COMMIT;
+    `);
+  }
 }
 
 export default db;
@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from time import perf_counter
+import numpy as np
+
+# In-process latency/counter registry for the bridge hot loop. Recording is a
+# perf_counter pair and a deque append under a per-stage lock (the mt5 and http
+# threads both record), so it stays on in production; the percentiles are only
+# computed when a snapshot is taken.
+#
+#   with metrics.timer("symbol_info_tick"):
+#       tick = mt5.symbol_info_tick(SYMBOL)
+#   metrics.count("dropped_ticks")
+#   metrics.snapshot() -> {"uptime_s", "stages": {name: {count, errors, p50_ms, p95_ms, p99_ms, max_ms, ...}}, "counters"}
+
+WINDOW = 4096 # Latest samples per stage the percentiles are computed over
+SNAPSHOT_INTERVAL = 10.0 # seconds
+
+class StageStats:
+    """Latency samples and counts of one stage; recorded from the bridge's mt5 and http threads alike"""
+    __slots__ = ("lock", "samples", "count", "errors", "total", "max")
+
+    def __init__(self, window=WINDOW):
+        self.lock = threading.Lock() # Uncontended in practice: one stage is mostly recorded by one thread
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds, error=False):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            if error:
+                self.errors += 1
+
+    def error(self):
+        with self.lock:
+            self.errors += 1
+
+    def summary(self):
+        with self.lock:
+            out = {"count": self.count, "errors": self.errors}
+            samples = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples))
+            total, max_ = self.total, self.max
+        if len(samples):
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+            out.update(
+                p50_ms=round(p50, 3), p95_ms=round(p95, 3), p99_ms=round(p99, 3),
+                max_ms=round(max_ * 1000, 3), mean_ms=round(total / out["count"] * 1000, 3)
+            )
+        return out
+
+class _Timer:
+    __slots__ = ("stats", "start")
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stats.observe(perf_counter() - self.start, error=exc_type is not None)
+        return False
+
+class Metrics:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def stage(self, name):
+        stats = self.stages.get(name)
+        if stats is None:
+            with self.lock:
+                stats = self.stages.setdefault(name, StageStats(self.window))
+        return stats
+
+    def timer(self, name):
+        """Context manager recording the block's latency (and an error if it raises) under `name`"""
+        return _Timer(self.stage(name))
+
+    def observe(self, name, seconds):
+        self.stage(name).observe(seconds)
+
+    def error(self, name):
+        """Counts an error under `name` that timer() didn't see (a bad result rather than an exception)"""
+        self.stage(name).error()
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self.lock:
+            stages = dict(self.stages)
+            counters = dict(self.counters)
+        return {
+            "timestamp": int(time.time() * 1000),
+            "uptime_s": round(time.time() - self.started, 1),
+            "stages": {name: stats.summary() for name, stats in sorted(stages.items())},
+            "counters": counters,
+        }
+
+    def write_snapshot(self, path):
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def start_snapshots(self, path, interval=SNAPSHOT_INTERVAL):
+        """Rewrites `path` with a JSON snapshot every `interval` seconds (daemon thread)"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_snapshot(path)
+                except OSError:
+                    pass
+        thread = threading.Thread(target=loop, name="metrics-snapshot", daemon=True)
+        thread.start()
+        return thread
+
+# Process-wide registry
+registry = Metrics()
+timer = registry.timer
+observe = registry.observe
+error = registry.error
+count = registry.count
+snapshot = registry.snapshot
@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Trained models, one directory per version:
+#   models/<version>/model.ubj      booster in XGBoost's native binary (UBJSON) format
+#   models/<version>/manifest.json  features, timeframe, training range, metrics, params
+#   models/current.json             pointer to the served version (with a copy of its manifest)
+# A version is written to a temp directory and renamed into place, and the pointer
+# is swapped with os.replace, so readers only ever see complete versions. Readers
+# detect a new version from the pointer's mtime (one stat) and load the booster
+# without unpickling (xgboost itself is only imported to load).
+MODEL_DIR = "models"
+CURRENT_FILE = "current.json"
+MODEL_FILE = "model.ubj"
+MANIFEST_FILE = "manifest.json"
+KEEP_VERSIONS = 10 # Older versions are pruned on publish (never the current one)
+CHECK_INTERVAL = 5.0 # seconds between pointer checks of watch()
+
+class ModelRegistry:
+    def __init__(self, root=MODEL_DIR, keep=KEEP_VERSIONS):
+        self.root = root
+        self.keep = keep
+        self.current_path = os.path.join(root, CURRENT_FILE)
+
+    def _version_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def versions(self):
+        """Published versions, oldest first (names sort by publish time)"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root)
+                      if not d.startswith(".") and os.path.isfile(os.path.join(self.root, d, MANIFEST_FILE)))
+
+    # --- Writer ---
+    def publish(self, booster, manifest):
+        """Saves `booster` as a new version, points current at it and returns the version name"""
+        os.makedirs(self.root, exist_ok=True)
+        version = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S-%f")
+        manifest = dict(manifest, version=version, published=datetime.now(timezone.utc).isoformat())
+
+        tmp_dir = os.path.join(self.root, f".tmp-{version}")
+        os.makedirs(tmp_dir)
+        try:
+            booster.save_model(os.path.join(tmp_dir, MODEL_FILE))
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_dir, self._version_dir(version))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self.set_current(version, manifest)
+        self._prune(version)
+        return version
+
+    def set_current(self, version, manifest=None):
+        """Points current at a published version (also how to roll back)"""
+        if manifest is None:
+            manifest = self.manifest(version)
+        with open(self.current_path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(self.current_path + ".tmp", self.current_path)
+
+    def _prune(self, current):
+        for version in self.versions()[:-self.keep]:
+            if version != current:
+                shutil.rmtree(self._version_dir(version), ignore_errors=True)
+
+    # --- Reader ---
+    def manifest(self, version=None):
+        """Manifest of `version` (default: the current one), or None"""
+        path = self.current_path if version is None else os.path.join(self._version_dir(version), MANIFEST_FILE)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def current_mtime(self):
+        try:
+            return os.stat(self.current_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self, version=None):
+        """(booster, manifest) of `version` (default: current), or (None, None) when there is none"""
+        manifest = self.manifest(version)
+        if manifest is None:
+            return None, None
+        import xgboost as xgb
+        booster = xgb.Booster(model_file=os.path.join(self._version_dir(manifest["version"]), MODEL_FILE))
+        return booster, manifest
+
+    def watch(self, on_change, since=None, interval=CHECK_INTERVAL):
+        """Calls on_change(booster, manifest) from a daemon thread whenever current changes after `since` (a current_mtime())"""
+        def loop():
+            seen = since
+            while True:
+                time.sleep(interval)
+                mtime = self.current_mtime()
+                if mtime is None or mtime == seen:
+                    continue
+                seen = mtime
+                try:
+                    booster, manifest = self.load()
+                    if booster is not None:
+                        on_change(booster, manifest)
+                except Exception as e:
+                    logger.error(f"Model reload failed: {e}")
+        thread = threading.Thread(target=loop, name="model-watch", daemon=True)
+        thread.start()
+        return thread
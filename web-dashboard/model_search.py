@@ -0,0 +1,198 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from multiprocessing import shared_memory
+from xgboost import XGBClassifier
+import ai_engine
+from data_provider import BarProvider
+from ai_engine import TRAINING_TIMEFRAME, LOOK_AHEAD, XGB_PARAMS, MODEL_CONFIG_PATH
+
+# Hyperparameter search for the signal model with purged walk-forward CV.
+# Features are loaded once in the parent from the feature store and placed in
+# shared memory; pool workers fit (config, fold) tasks on zero-copy views of
+# contiguous row ranges, with XGBoost's histogram method and an explicit thread
+# cap per worker (n_jobs) so workers x threads never exceeds the cores. The
+# winning configuration is saved to MODEL_CONFIG_PATH, which ai_engine uses for
+# its next training. tree_method and n_jobs are fixed by the search and
+# override any value in a grid or SEARCH_SPACE.
+#
+# Fold k trains on every row before its test block (expanding window) minus the
+# last LOOK_AHEAD rows, whose labels look into the test block (purge).
+
+SEARCH_BARS = 30000
+FOLDS = 4
+
+DEFAULT_GRID = {
+    "max_depth": [3, 5, 7],
+    "learning_rate": [0.05, 0.1],
+    "n_estimators": [100, 200],
+    "subsample": [0.8, 1.0],
+}
+
+# Random search: (low, high) ranges, integers when both bounds are
+SEARCH_SPACE = {
+    "max_depth": (3, 8),
+    "learning_rate": (0.02, 0.3),
+    "n_estimators": (50, 400),
+    "min_child_weight": (1, 10),
+    "subsample": (0.6, 1.0),
+    "colsample_bytree": (0.6, 1.0),
+}
+
+RANK_METRICS = {"logloss": False, "accuracy": True, "signal_precision": True} # metric -> higher is better
+
+# --- Shared features ---
+_shm = None
+_X = None
+_y = None
+_threads = 1
+
+@contextmanager
+def share(X, y):
+    """Copies the feature matrix (float64, n x k) and labels (int64) into one shared-memory block"""
+    n, k = X.shape
+    shm = shared_memory.SharedMemory(create=True, size=max(1, n * (k + 1) * 8))
+    try:
+        np.ndarray((n, k), dtype=np.float64, buffer=shm.buf)[:] = X
+        np.ndarray((n,), dtype=np.int64, buffer=shm.buf, offset=n * k * 8)[:] = y
+        yield shm.name, (n, k)
+    finally:
+        shm.close()
+        shm.unlink()
+
+def attach(shm_name, shape, threads):
+    """Pool initializer: maps the shared block read-only and sets the n_jobs of this worker's fits"""
+    global _shm, _X, _y, _threads
+    n, k = shape
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _X = np.ndarray((n, k), dtype=np.float64, buffer=_shm.buf)
+    _y = np.ndarray((n,), dtype=np.int64, buffer=_shm.buf, offset=n * k * 8)
+    _X.flags.writeable = False
+    _y.flags.writeable = False
+    _threads = threads
+
+# --- Worker side ---
+def _run_fold(task):
+    config_id, fold, params, (train_stop, test_start, test_stop) = task
+    X_train, y_train = _X[:train_stop], _y[:train_stop]
+    X_test, y_test = _X[test_start:test_stop], _y[test_start:test_stop]
+
+    start = time.perf_counter()
+    model = XGBClassifier(**{**XGB_PARAMS, **params, "tree_method": "hist", "n_jobs": _threads})
+    model.fit(X_train, y_train)
+    metrics = ai_engine.classification_metrics(y_test, model.predict_proba(X_test))
+    return config_id, {"fold": fold, "train": train_stop, "test": test_stop - test_start,
+                       "fit_s": round(time.perf_counter() - start, 3), **metrics}
+
+# --- Parent side ---
+def purged_folds(n, folds=FOLDS, purge=LOOK_AHEAD):
+    """(train_stop, test_start, test_stop) per fold: n rows in folds + 1 blocks, block k + 1 tested on the rows before it"""
+    edges = np.linspace(0, n, folds + 2).astype(int)
+    return [(int(edges[k + 1]) - purge, int(edges[k + 1]), int(edges[k + 2])) for k in range(folds)]
+
+def expand_grid(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def sample_space(space, count, seed=42):
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(count):
+        config = {}
+        for key, (low, high) in space.items():
+            config[key] = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else round(rng.uniform(low, high), 4)
+        configs.append(config)
+    return configs
+
+def search(X, y, configs, folds=FOLDS, workers=None, rank_by="logloss"):
+    """Scores every config on the purged folds in a process pool; results ranked best first"""
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    bounds = purged_folds(len(X), folds)
+    tasks = [(i, k, config, b) for i, config in enumerate(configs) for k, b in enumerate(bounds)]
+
+    per_config = {i: [] for i in range(len(configs))}
+    with share(np.ascontiguousarray(X, dtype=np.float64), np.asarray(y, dtype=np.int64)) as (shm_name, shape):
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach, initargs=(shm_name, shape, threads)) as pool:
+            for future in as_completed([pool.submit(_run_fold, task) for task in tasks]):
+                config_id, fold_result = future.result()
+                per_config[config_id].append(fold_result)
+
+    results = []
+    for i, config in enumerate(configs):
+        fold_results = sorted(per_config[i], key=lambda r: r["fold"])
+        summary = {"params": config, "folds": fold_results}
+        for metric in list(RANK_METRICS) + ["signal_rate"]:
+            values = [r[metric] for r in fold_results]
+            summary[f"mean_{metric}"] = round(float(np.mean(values)), 5)
+            summary[f"std_{metric}"] = round(float(np.std(values)), 5)
+        results.append(summary)
+
+    results.sort(key=lambda r: r[f"mean_{rank_by}"], reverse=RANK_METRICS[rank_by])
+    return {"workers": workers, "threads_per_worker": threads, "results": results}
+
+def save_config(best, rank_by, times, path=MODEL_CONFIG_PATH):
+    config = {
+        "params": {**{k: v for k, v in best["params"].items() if k != "n_jobs"}, "tree_method": "hist"},
+        "rank_by": rank_by,
+        "cv": {k: v for k, v in best.items() if k.startswith(("mean_", "std_"))},
+        "data_range": {
+            "start": datetime.fromtimestamp(int(times[0]), tz=timezone.utc).isoformat(),
+            "end": datetime.fromtimestamp(int(times[-1]), tz=timezone.utc).isoformat(),
+            "samples": int(len(times)),
+        },
+        "timestamp": datetime.now().isoformat(),
+    }
+    with open(path + ".tmp", "w") as f:
+        json.dump(config, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return config
+
+def run_search(bars=SEARCH_BARS, timeframe=TRAINING_TIMEFRAME, grid=None, random_count=0, folds=FOLDS,
+               workers=None, rank_by="logloss", save=True, top=None, seed=42):
+    online = ai_engine.connect_mt5()
+    try:
+        # Precomputed columns from the feature store (only bars it lacks are computed); workers only read them
+        window = ai_engine.stored_window(BarProvider(online=online), timeframe=timeframe, bars=bars)
+    finally:
+        if online:
+            ai_engine.mt5.shutdown()
+    if window is None:
+        return {"error": "Failed to load rates"}
+    X, y, times, _ = window
+    features = list(ai_engine.FEATURE_COLS)
+    configs = sample_space(SEARCH_SPACE, random_count, seed) if random_count else expand_grid(grid or DEFAULT_GRID)
+
+    res = search(X, y, configs, folds=folds, workers=workers, rank_by=rank_by)
+    res.update(samples=len(X), features=features, configs=len(configs), folds=folds, rank_by=rank_by)
+    if save and res["results"]:
+        res["saved"] = save_config(res["results"][0], rank_by, times)
+    if top:
+        res["results"] = res["results"][:top]
+    return res
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Purged walk-forward CV hyperparameter search for the signal model")
+    parser.add_argument("--bars", type=int, default=SEARCH_BARS, help=f"{TRAINING_TIMEFRAME} bars to search on")
+    parser.add_argument("--grid", help="JSON object of XGBoost parameter -> list of values (defaults to DEFAULT_GRID)")
+    parser.add_argument("--random", type=int, default=0, help="random search: configs sampled from SEARCH_SPACE instead of a grid")
+    parser.add_argument("--folds", type=int, default=FOLDS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", choices=sorted(RANK_METRICS), default="logloss")
+    parser.add_argument("--top", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-save", action="store_true", help=f"don't write the winner to {MODEL_CONFIG_PATH}")
+    args = parser.parse_args()
+
+    grid = json.loads(args.grid) if args.grid else None
+    res = run_search(args.bars, grid=grid, random_count=args.random, folds=args.folds, workers=args.workers,
+                     rank_by=args.rank_by, save=not args.no_save, top=args.top, seed=args.seed)
+    json.dump(res, sys.stdout, indent=2)
@@ -0,0 +1,448 @@
+import argparse
+import os
+import random
+import runpy
+import sys
+import threading
+import time
+import zlib
+from collections import namedtuple
+from datetime import datetime, timezone
+import numpy as np
+
+# Simulated MetaTrader5 module for Linux CI and offline load tests. It serves
+# the calls this project makes (initialize, symbol_info_tick, account_info,
+# copy_rates_from_pos, copy_rates_range, copy_ticks_range, last_error, ...)
+# from synthetic or recorded M1 bars replayed on a virtual clock running at
+# `speed` x real time, with configurable call latency and failure injection.
+#
+#   python mt5_sim.py --speed 100 --latency 0.001 --failure-rate 0.01 bridge.py --async --stream
+#
+# runs bridge.py unchanged with this module installed as MetaTrader5. In-process:
+#
+#   import mt5_sim; mt5_sim.install(speed=100)  # before the first `import MetaTrader5`
+#
+# Every timeframe is aggregated from the M1 bars, and prices move along each
+# M1 bar's open -> low/high -> high/low -> close path, so ticks, forming bars
+# and history always agree. Bars and ticks after the virtual "now" do not exist.
+
+# Same values as the MetaTrader5 package
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+
+COPY_TICKS_ALL = -1
+COPY_TICKS_INFO = 1
+COPY_TICKS_TRADE = 2
+
+RES_S_OK = 1
+RES_E_FAIL = -1
+RES_E_INVALID_PARAMS = -2
+RES_E_NOT_FOUND = -4
+RES_E_INTERNAL_FAIL_CONNECT = -10004
+RES_E_INTERNAL_FAIL_TIMEOUT = -10005
+
+TIMEFRAME_SECONDS = {
+    TIMEFRAME_M1: 60, TIMEFRAME_M5: 300, TIMEFRAME_M15: 900, TIMEFRAME_M30: 1800,
+    TIMEFRAME_H1: 3600, TIMEFRAME_H4: 14400, TIMEFRAME_D1: 86400,
+}
+
+POINT = 0.01 # Price of one spread point (XAUUSD)
+MAX_TICKS_PER_BAR = 600 # copy_ticks_range cap per M1 bar
+
+Tick = namedtuple("Tick", "time bid ask last volume time_msc flags volume_real")
+AccountInfo = namedtuple("AccountInfo", "login balance equity profit margin margin_free leverage currency server")
+
+TICK_RECORD_DTYPE = np.dtype([
+    ("time", np.int64), ("bid", np.float64), ("ask", np.float64), ("last", np.float64),
+    ("volume", np.uint64), ("time_msc", np.int64), ("flags", np.uint32), ("volume_real", np.float64),
+])
+
+# Defaults, overridable from the environment (MT5_SIM_SPEED=100 python bridge.py with the module installed)
+DEFAULTS = {
+    "speed": float(os.environ.get("MT5_SIM_SPEED", 1.0)),
+    "start": os.environ.get("MT5_SIM_START", "2024-01-08 12:00"),
+    "history_days": int(os.environ.get("MT5_SIM_HISTORY_DAYS", 90)),
+    "days": int(os.environ.get("MT5_SIM_DAYS", 30)),
+    "source": os.environ.get("MT5_SIM_SOURCE", "synthetic"),
+    "seed": int(os.environ.get("MT5_SIM_SEED", 42)),
+    "latency": float(os.environ.get("MT5_SIM_LATENCY", 0.0)),
+    "jitter": float(os.environ.get("MT5_SIM_JITTER", 0.0)),
+    "failure_rate": float(os.environ.get("MT5_SIM_FAILURE_RATE", 0.0)),
+    "disconnect_every": float(os.environ.get("MT5_SIM_DISCONNECT_EVERY", 0.0)),
+    "reconnect_delay": float(os.environ.get("MT5_SIM_RECONNECT_DELAY", 5.0)),
+    "balance": float(os.environ.get("MT5_SIM_BALANCE", 10000.0)),
+}
+
+def _to_ts(value):
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=value.tzinfo or timezone.utc).timestamp()
+    return float(value)
+
+class VirtualClock:
+    """now() = start + elapsed real time x speed; speed 0 is a manual clock moved with advance()"""
+
+    def __init__(self, start, speed=1.0):
+        self.start = start
+        self.speed = speed
+        self.origin = time.monotonic()
+        self.offset = 0.0
+
+    def now(self):
+        return self.start + self.offset + (time.monotonic() - self.origin) * self.speed
+
+    def advance(self, seconds):
+        self.offset += seconds
+
+class _Market:
+    """M1 bars of one symbol and the timeframes aggregated from them"""
+
+    def __init__(self, m1):
+        self.m1 = m1
+        self.times = m1['time']
+        # Intrabar path: open -> low -> high -> close on up bars, open -> high -> low -> close on down bars
+        up = m1['close'] >= m1['open']
+        self.path = np.stack([
+            m1['open'], np.where(up, m1['low'], m1['high']), np.where(up, m1['high'], m1['low']), m1['close'],
+        ], axis=1)
+        self.frames = {TIMEFRAME_M1: (m1, np.arange(len(m1) + 1))}
+
+    def frame(self, timeframe):
+        """(bars, first M1 index of each bar + sentinel) for a timeframe"""
+        if timeframe not in self.frames:
+            period = TIMEFRAME_SECONDS[timeframe]
+            group = self.times // period
+            starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+            ends = np.r_[starts[1:], len(group)] - 1
+            bars = np.empty(len(starts), dtype=self.m1.dtype)
+            bars['time'] = group[starts] * period
+            bars['open'] = self.m1['open'][starts]
+            bars['high'] = np.maximum.reduceat(self.m1['high'], starts)
+            bars['low'] = np.minimum.reduceat(self.m1['low'], starts)
+            bars['close'] = self.m1['close'][ends]
+            bars['tick_volume'] = np.add.reduceat(self.m1['tick_volume'], starts)
+            bars['spread'] = self.m1['spread'][starts]
+            bars['real_volume'] = np.add.reduceat(self.m1['real_volume'], starts)
+            self.frames[timeframe] = (bars, np.r_[starts, len(group)])
+        return self.frames[timeframe]
+
+    def price(self, i, frac):
+        """Price along M1 bar i's path at frac (0 = open, 1 = close)"""
+        seg = min(int(frac * 3), 2)
+        a, b = self.path[i, seg], self.path[i, seg + 1]
+        return a + (b - a) * (frac * 3 - seg)
+
+    def cursor(self, now):
+        """(index of the M1 bar containing or last before `now`, fraction of it elapsed), i = -1 before the data"""
+        i = int(np.searchsorted(self.times, now, side='right')) - 1
+        frac = min(1.0, (now - self.times[i]) / 60.0) if i >= 0 else 0.0
+        return i, frac
+
+    def partial_m1(self, i, frac):
+        """M1 bar i as seen `frac` of the way through it"""
+        bar = self.m1[i].copy()
+        if frac >= 1.0:
+            return bar
+        price = round(float(self.price(i, frac)), 2)
+        reached = self.path[i, :min(int(frac * 3), 2) + 1]
+        bar['high'] = max(reached.max(), price)
+        bar['low'] = min(reached.min(), price)
+        bar['close'] = price
+        bar['tick_volume'] = max(1, int(bar['tick_volume'] * frac))
+        return bar
+
+    def bars(self, timeframe, lo, hi, now):
+        """Bars lo..hi-1 of a timeframe, the last one cut at `now` if it is still forming"""
+        bars, starts = self.frame(timeframe)
+        out = bars[lo:hi].copy()
+        i, frac = self.cursor(now)
+        if len(out) and starts[hi - 1] <= i < starts[hi]:
+            # Forming bar: the M1 bars closed so far plus the forming M1 bar
+            m1 = self.m1[starts[hi - 1]:i]
+            current = self.partial_m1(i, frac)
+            last = out[-1]
+            last['high'] = max(m1['high'].max(), current['high']) if len(m1) else current['high']
+            last['low'] = min(m1['low'].min(), current['low']) if len(m1) else current['low']
+            last['close'] = current['close']
+            last['tick_volume'] = int(m1['tick_volume'].sum()) + int(current['tick_volume'])
+            out[-1] = last
+        return out
+
+    def last_bar_index(self, timeframe, now):
+        """Index of the newest bar of a timeframe that has started by `now` (-1 if none)"""
+        bars, _ = self.frame(timeframe)
+        return int(np.searchsorted(bars['time'], now, side='right')) - 1
+
+    def ticks(self, lo, hi, now):
+        """Ticks along the paths of M1 bars lo..hi-1 (tick_volume ticks per bar, capped), up to `now`"""
+        m1 = self.m1[lo:hi]
+        counts = np.clip(m1['tick_volume'].astype(np.int64), 1, MAX_TICKS_PER_BAR)
+        bar = np.repeat(np.arange(lo, hi), counts)
+        j = np.arange(len(bar)) - np.repeat(np.cumsum(counts) - counts, counts)
+        frac = (j + 0.5) / np.repeat(counts, counts)
+        seg = np.minimum((frac * 3).astype(np.int64), 2)
+        a, b = self.path[bar, seg], self.path[bar, seg + 1]
+        bid = np.round(a + (b - a) * (frac * 3 - seg), 2)
+
+        out = np.zeros(len(bar), dtype=TICK_RECORD_DTYPE)
+        out['time_msc'] = self.times[bar] * 1000 + (frac * 60000).astype(np.int64)
+        out['time'] = out['time_msc'] // 1000
+        out['bid'] = bid
+        out['ask'] = np.round(bid + self.m1['spread'][bar] * POINT, 2)
+        out['flags'] = 6 # TICK_FLAG_BID | TICK_FLAG_ASK
+        return out[out['time_msc'] <= now * 1000]
+
+class Simulator:
+    """One simulated terminal: market data, virtual clock, connection state and injected faults"""
+
+    def __init__(self, speed=DEFAULTS["speed"], start=DEFAULTS["start"], history_days=DEFAULTS["history_days"],
+                 days=DEFAULTS["days"], source=DEFAULTS["source"], seed=DEFAULTS["seed"],
+                 latency=DEFAULTS["latency"], jitter=DEFAULTS["jitter"], failure_rate=DEFAULTS["failure_rate"],
+                 disconnect_every=DEFAULTS["disconnect_every"], reconnect_delay=DEFAULTS["reconnect_delay"],
+                 balance=DEFAULTS["balance"]):
+        self.start_ts = datetime.fromisoformat(start).replace(tzinfo=timezone.utc).timestamp()
+        self.clock = VirtualClock(self.start_ts, speed)
+        self.history_days = history_days
+        self.days = days
+        self.source = source
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.disconnect_every = disconnect_every # Mean real seconds between terminal disconnects (0: never)
+        self.reconnect_delay = reconnect_delay # Real seconds initialize() keeps failing after a disconnect
+        self.balance = balance
+
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock() # Bars are generated/loaded on a symbol's first call
+        self.markets = {}
+        self.connected = False
+        self.disconnected_at = None
+        self.next_disconnect = None
+        self.error = (RES_S_OK, "Success")
+        self.stats = {"calls": {}, "failures": 0, "disconnects": 0}
+
+    # --- Market data ---
+    def market(self, symbol):
+        if symbol not in self.markets:
+            with self.load_lock:
+                if symbol not in self.markets:
+                    self.markets[symbol] = self._load(symbol)
+        return self.markets[symbol]
+
+    def _load(self, symbol):
+        first = self.start_ts - self.history_days * 86400
+        last = self.start_ts + self.days * 86400
+        if self.source == "synthetic":
+            from synthetic_data import generate_bars
+            start = datetime.fromtimestamp(first, tz=timezone.utc).strftime("%Y-%m-%d")
+            m1 = generate_bars(int((last - first) // 60), "M1", seed=self.seed + zlib.crc32(symbol.encode()), start=start)
+            m1 = m1[m1['time'] < last]
+        elif self.source == "cache":
+            from data_provider import BarProvider # Recorded bars from data_cache/<symbol>/M1
+            m1 = BarProvider(online=False).get_rates(symbol, "M1", int(first), int(last))
+            if m1 is None:
+                return None
+            m1 = np.array(m1)
+        else:
+            raise ValueError(f"Unknown source: {self.source}")
+        return _Market(m1) if len(m1) else None
+
+    # --- Faults ---
+    def _call(self, name):
+        """Applies latency and faults to one call; returns False (with last_error set) if it must fail"""
+        with self.lock:
+            self.stats["calls"][name] = self.stats["calls"].get(name, 0) + 1
+            delay = max(0.0, self.rng.gauss(self.latency, self.jitter)) if self.latency or self.jitter else 0.0
+            ok = self._check()
+        if delay:
+            time.sleep(delay)
+        return ok
+
+    def _check(self):
+        if self.connected and self.next_disconnect is not None and time.monotonic() >= self.next_disconnect:
+            self.connected = False
+            self.disconnected_at = time.monotonic()
+            self.stats["disconnects"] += 1
+        if not self.connected:
+            self.error = (RES_E_INTERNAL_FAIL_CONNECT, "No IPC connection")
+            return False
+        if self.failure_rate and self.rng.random() < self.failure_rate:
+            self.stats["failures"] += 1
+            self.error = (RES_E_INTERNAL_FAIL_TIMEOUT, "Terminal call timeout")
+            return False
+        self.error = (RES_S_OK, "Success")
+        return True
+
+    def _not_found(self, symbol):
+        self.error = (RES_E_NOT_FOUND, f"Terminal: Not found ({symbol})")
+        return None
+
+    # --- MetaTrader5 API ---
+    def initialize(self, *args, **kwargs):
+        with self.lock:
+            self.stats["calls"]["initialize"] = self.stats["calls"].get("initialize", 0) + 1
+            if self.disconnected_at is not None and time.monotonic() - self.disconnected_at < self.reconnect_delay:
+                self.error = (RES_E_INTERNAL_FAIL_CONNECT, "Terminal: connection lost, reconnecting")
+                return False
+            self.connected = True
+            self.disconnected_at = None
+            self.next_disconnect = (time.monotonic() + self.rng.expovariate(1.0 / self.disconnect_every)
+                                    if self.disconnect_every else None)
+            self.error = (RES_S_OK, "Success")
+            return True
+
+    def shutdown(self):
+        with self.lock:
+            self.connected = False
+        return True
+
+    def last_error(self):
+        return self.error
+
+    def symbol_select(self, symbol, enable=True):
+        if not self._call("symbol_select"):
+            return False
+        if self.market(symbol) is None:
+            self._not_found(symbol)
+            return False
+        return True
+
+    def symbol_info_tick(self, symbol):
+        if not self._call("symbol_info_tick"):
+            return None
+        market = self.market(symbol)
+        if market is None:
+            return self._not_found(symbol)
+        now = self.clock.now()
+        i, frac = market.cursor(now)
+        if i < 0:
+            return self._not_found(symbol)
+        bid = round(float(market.price(i, frac)), 2)
+        ask = round(bid + int(market.m1['spread'][i]) * POINT, 2)
+        # Market closed (past the last bar's minute): the last quote stays, like the terminal at the weekend
+        t = now if frac < 1.0 else float(market.times[i]) + 59.999
+        return Tick(int(t), bid, ask, 0.0, 0, int(t * 1000), 6, 0.0)
+
+    def account_info(self):
+        if not self._call("account_info"):
+            return None
+        return AccountInfo(1000001, self.balance, self.balance, 0.0, 0.0, self.balance, 100, "USD", "MT5Sim-Demo")
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        if not self._call("copy_rates_from_pos"):
+            return None
+        if timeframe not in TIMEFRAME_SECONDS:
+            self.error = (RES_E_INVALID_PARAMS, "Invalid timeframe")
+            return None
+        market = self.market(symbol)
+        if market is None:
+            return self._not_found(symbol)
+        now = self.clock.now()
+        hi = market.last_bar_index(timeframe, now) + 1 - start_pos
+        lo = max(0, hi - count)
+        return market.bars(timeframe, lo, max(lo, hi), now)
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        if not self._call("copy_rates_range"):
+            return None
+        if timeframe not in TIMEFRAME_SECONDS:
+            self.error = (RES_E_INVALID_PARAMS, "Invalid timeframe")
+            return None
+        market = self.market(symbol)
+        if market is None:
+            return self._not_found(symbol)
+        now = self.clock.now()
+        bars, _ = market.frame(timeframe)
+        lo = int(np.searchsorted(bars['time'], _to_ts(date_from), side='left'))
+        hi = min(int(np.searchsorted(bars['time'], _to_ts(date_to), side='right')), market.last_bar_index(timeframe, now) + 1)
+        return market.bars(timeframe, lo, max(lo, hi), now)
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags=COPY_TICKS_ALL):
+        if not self._call("copy_ticks_range"):
+            return None
+        market = self.market(symbol)
+        if market is None:
+            return self._not_found(symbol)
+        now = self.clock.now()
+        start, end = _to_ts(date_from), min(_to_ts(date_to), now)
+        lo = max(0, int(np.searchsorted(market.times, start - 60, side='right')))
+        hi = int(np.searchsorted(market.times, end, side='right'))
+        ticks = market.ticks(lo, max(lo, hi), end)
+        return ticks[ticks['time_msc'] >= start * 1000]
+
+    def summary(self):
+        with self.lock:
+            return {
+                "virtual_time": datetime.fromtimestamp(self.clock.now(), tz=timezone.utc).isoformat(),
+                "speed": self.clock.speed,
+                "connected": self.connected,
+                "calls": dict(self.stats["calls"]),
+                "failures": self.stats["failures"],
+                "disconnects": self.stats["disconnects"],
+            }
+
+# Module-level API (what `import MetaTrader5 as mt5` code calls), backed by one Simulator
+_sim = None
+
+def simulator():
+    global _sim
+    if _sim is None:
+        _sim = Simulator()
+    return _sim
+
+def configure(**kwargs):
+    """Replaces the simulated terminal (Simulator keyword arguments; omitted ones use DEFAULTS)"""
+    global _sim
+    _sim = Simulator(**kwargs)
+    return _sim
+
+def install(**kwargs):
+    """Makes `import MetaTrader5` return this module (call before the project modules are imported)"""
+    configure(**kwargs)
+    sys.modules["MetaTrader5"] = sys.modules[__name__]
+    return _sim
+
+def initialize(*args, **kwargs): return simulator().initialize(*args, **kwargs)
+def shutdown(): return simulator().shutdown()
+def last_error(): return simulator().last_error()
+def symbol_select(symbol, enable=True): return simulator().symbol_select(symbol, enable)
+def symbol_info_tick(symbol): return simulator().symbol_info_tick(symbol)
+def account_info(): return simulator().account_info()
+def copy_rates_from_pos(symbol, timeframe, start_pos, count): return simulator().copy_rates_from_pos(symbol, timeframe, start_pos, count)
+def copy_rates_range(symbol, timeframe, date_from, date_to): return simulator().copy_rates_range(symbol, timeframe, date_from, date_to)
+def copy_ticks_range(symbol, date_from, date_to, flags=COPY_TICKS_ALL): return simulator().copy_ticks_range(symbol, date_from, date_to, flags)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a script with this module installed as MetaTrader5")
+    parser.add_argument("--speed", type=float, default=DEFAULTS["speed"], help="virtual clock speed (x real time, e.g. 10-1000)")
+    parser.add_argument("--start", default=DEFAULTS["start"], help="virtual time the replay starts at (UTC)")
+    parser.add_argument("--history-days", type=int, default=DEFAULTS["history_days"], help="days of bars before --start")
+    parser.add_argument("--days", type=int, default=DEFAULTS["days"], help="days of bars replayed after --start")
+    parser.add_argument("--source", choices=["synthetic", "cache"], default=DEFAULTS["source"],
+                        help="synthetic bars, or recorded M1 bars from data_cache")
+    parser.add_argument("--seed", type=int, default=DEFAULTS["seed"])
+    parser.add_argument("--latency", type=float, default=DEFAULTS["latency"], help="mean seconds added to every call")
+    parser.add_argument("--jitter", type=float, default=DEFAULTS["jitter"], help="std dev of the added latency")
+    parser.add_argument("--failure-rate", type=float, default=DEFAULTS["failure_rate"], help="probability a call returns None")
+    parser.add_argument("--disconnect-every", type=float, default=DEFAULTS["disconnect_every"],
+                        help="mean seconds between terminal disconnects (0: never)")
+    parser.add_argument("--reconnect-delay", type=float, default=DEFAULTS["reconnect_delay"],
+                        help="seconds initialize() keeps failing after a disconnect")
+    parser.add_argument("script", help="Python script to run (e.g. bridge.py)")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="arguments passed to the script")
+    args = parser.parse_args()
+
+    install(
+        speed=args.speed, start=args.start, history_days=args.history_days, days=args.days, source=args.source,
+        seed=args.seed, latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+        disconnect_every=args.disconnect_every, reconnect_delay=args.reconnect_delay,
+    )
+    sys.argv = [args.script] + args.args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    runpy.run_path(args.script, run_name="__main__")
@@ -1,40 +1,186 @@
 import requests
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
 from datetime import datetime
 import pytz
 
 API_URL = "https://nfs.faireconomy.media/ff_calendar_thisweek.json"
 
+logger = logging.getLogger(__name__)
+
+# The weekly calendar is kept on disk (data_cache/news/calendar.json) with its
+# ETag/Last-Modified, refreshed with conditional requests and, when the feed is
+# unreachable, served from the last good copy. High impact events are indexed
+# as sorted, merged UTC blackout intervals, so the per-tick check is a bisect.
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_cache", "news", "calendar.json")
+REFRESH_INTERVAL = 3600 # seconds
+RETRY_INTERVAL = 300 # seconds, after a failed refresh
+MAX_AGE = 3600 # A cached copy younger than this is used without a request
+
+COUNTRIES = ("USD", "All")
+KEY_IMPACTS = ("High", "Medium") # Listed as today's key events
+BLACKOUT_IMPACTS = ("High",) # Suspend signals around these
+BLACKOUT_BEFORE = 15 * 60 # seconds before the event
+BLACKOUT_AFTER = 15 * 60 # seconds after the event
+
+def _epoch(date_str):
+    """Feed date (2026-02-01T05:15:00-05:00) -> UTC epoch seconds"""
+    d = datetime.fromisoformat(date_str)
+    if d.tzinfo is None:
+        d = pytz.timezone("US/Eastern").localize(d)
+    return d.timestamp()
+
+class NewsCalendar:
+    def __init__(self, cache_path=CACHE_PATH, url=API_URL):
+        self.cache_path = cache_path
+        self.url = url
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.cache = {}
+        self._build_index([])
+        self._load()
+
+    # --- Cache ---
+    def _load(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._apply(cache)
+
+    def _save(self, cache):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(self.cache_path + ".tmp", "w") as f:
+            json.dump(cache, f)
+        os.replace(self.cache_path + ".tmp", self.cache_path)
+
+    def _apply(self, cache):
+        with self.lock:
+            self.cache = cache
+            self._build_index(cache.get("events", []))
+
+    @property
+    def age(self):
+        """Seconds since the cached copy was last confirmed (inf without one)"""
+        fetched = self.cache.get("fetched_at")
+        return time.time() - fetched if fetched else float("inf")
+
+    def refresh(self, force=False, max_age=MAX_AGE):
+        """Conditional fetch of the feed (skipped while the copy is younger than max_age). True if the copy is current."""
+        if not force and self.age < max_age:
+            return True
+        cache = self.cache
+        headers = {}
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+        try:
+            response = self.session.get(self.url, headers=headers, timeout=10)
+            if response.status_code == 304:
+                cache = dict(cache, fetched_at=time.time())
+            else:
+                response.raise_for_status()
+                cache = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "fetched_at": time.time(),
+                    "events": response.json(),
+                }
+        except Exception as e:
+            logger.warning(f"News refresh failed, using the last good copy: {e}")
+            return False
+        self._save(cache)
+        self._apply(cache)
+        return True
+
+    def start(self, interval=REFRESH_INTERVAL, on_refresh=None):
+        """Refreshes in a daemon thread every `interval` seconds (RETRY_INTERVAL after a failure)"""
+        def loop():
+            while True:
+                ok = self.refresh(max_age=interval)
+                if on_refresh is not None:
+                    on_refresh(self)
+                time.sleep(max(1.0, interval - self.age) if ok else RETRY_INTERVAL)
+        thread = threading.Thread(target=loop, name="news-refresh", daemon=True)
+        thread.start()
+        return self
+
+    # --- Queries ---
+    def _build_index(self, events):
+        """Sorted event times and merged blackout intervals [start, end] (UTC epoch seconds)"""
+        key = []
+        blackout = []
+        for item in events:
+            if item.get('country') not in COUNTRIES:
+                continue
+            try:
+                t = _epoch(item['date'])
+            except (KeyError, ValueError):
+                continue
+            if item.get('impact') in KEY_IMPACTS:
+                key.append((t, item))
+            if item.get('impact') in BLACKOUT_IMPACTS:
+                blackout.append((t - BLACKOUT_BEFORE, t + BLACKOUT_AFTER, item))
+        key.sort(key=lambda e: e[0])
+        blackout.sort(key=lambda e: e[0])
+
+        merged = [] # [start, end, first event]
+        for start, end, item in blackout:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end, item])
+
+        # Swapped in one assignment, so queries from other threads never see a half-built index
+        self.index = (
+            [t for t, _ in key], [item for _, item in key],
+            [m[0] for m in merged], [m[1] for m in merged], [m[2] for m in merged],
+        )
+
+    def blackout(self, now=None):
+        """High impact event whose blackout window contains `now` (None outside every window)"""
+        now = time.time() if now is None else now
+        _, _, starts, ends, events = self.index
+        i = bisect_right(starts, now) - 1
+        if i >= 0 and now <= ends[i]:
+            return events[i]
+        return None
+
+    def upcoming(self, within, now=None, impacts=BLACKOUT_IMPACTS):
+        """First key event with now <= time <= now + within seconds, or None"""
+        now = time.time() if now is None else now
+        times, events, _, _, _ = self.index
+        i = bisect_left(times, now)
+        while i < len(times) and times[i] <= now + within:
+            if events[i].get('impact') in impacts:
+                return events[i]
+            i += 1
+        return None
+
+    def today(self):
+        """Today's USD/All high and medium impact events (get_today_news format)"""
+        today = datetime.now().date()
+        return [
+            {"title": item['title'], "impact": item['impact'], "time": item['date']}
+            for item in self.index[1]
+            if datetime.fromisoformat(item['date']).date() == today
+        ]
+
 def get_today_news():
     """Fetches and filters today's high impact news for USD"""
-    try:
-        response = requests.get(API_URL, timeout=10)
-        data = response.json()
-        
-        today = datetime.now().date()
-        news_items = []
-        
-        for item in data:
-            # Parse date (format: 2026-02-01T05:15:00-05:00)
-            item_date = datetime.fromisoformat(item['date']).date()
-            
-            if item_date == today:
-                # Filter for High impact or pertinent USD news
-                if item['country'] in ['USD', 'All'] and item['impact'] in ['High', 'Medium']:
-                    news_items.append({
-                        "title": item['title'],
-                        "impact": item['impact'],
-                        "time": item['date']
-                    })
-        
-        return news_items
-    except Exception as e:
-        print(f"Error fetching news: {e}")
-        return []
+    calendar = NewsCalendar()
+    calendar.refresh()
+    return calendar.today()
 
 if __name__ == "__main__":
-    import json
     import sys
-    
+
     today_news = get_today_news()
     if len(sys.argv) > 1 and sys.argv[1] == "--json":
         print(json.dumps(today_news))
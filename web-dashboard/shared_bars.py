@@ -0,0 +1,43 @@
+import numpy as np
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from strategy_v2 import ny_session_mask
+
+# Bar arrays shared with pool workers through one shared-memory block, so
+# each worker reads the same buffer instead of receiving a pickled copy.
+
+# Rows of the shared (len(ROWS), n_bars) float64 block
+ROWS = ("high", "low", "close", "tick_volume", "session")
+
+_shm = None
+_bars = None
+
+@contextmanager
+def share(df):
+    """Copies a time-indexed OHLCV DataFrame (+ NY-session mask) into shared memory.
+
+    Yields initargs for attach(); the block is released on exit.
+    """
+    n = len(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(ROWS) * n * 8))
+    try:
+        bars = np.ndarray((len(ROWS), n), dtype=np.float64, buffer=shm.buf)
+        for i, name in enumerate(ROWS[:-1]):
+            bars[i] = df[name].to_numpy(dtype=np.float64)
+        bars[-1] = ny_session_mask(df.index) # Same for every worker task: computed once here
+        del bars
+        yield (shm.name, (len(ROWS), n))
+    finally:
+        shm.close()
+        shm.unlink()
+
+def attach(shm_name, shape):
+    """Pool initializer: maps the shared block in the worker process"""
+    global _shm, _bars
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _bars = np.ndarray(shape, dtype=np.float64, buffer=_shm.buf)
+
+def bars():
+    """(high, low, close, tick_volume, session) views on the shared block"""
+    high, low, close, volume, session = _bars
+    return high, low, close, volume, session > 0
@@ -1,35 +1,37 @@
-import pandas as pd
 import numpy as np
 import pytz
-from datetime import datetime, time as dtime
+import indicators
+from collections import deque
+from datetime import datetime, timezone, time as dtime
+
+# pandas is imported by the vectorized helpers that need it, so the live bridge
+# (BreakoutState, is_ny_session) starts without paying for the import.
+
+VOLUME_RATIO_MIN = 1.3 # Breakout needs volume above this multiple of the 20-bar average
+RANGE_WINDOW = 16 # Bars in the H4 range (16 x M15)
 
 def calc_rsi(series, period=14):
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
+    import pandas as pd
+    return pd.Series(indicators.rsi(series, period), index=series.index)
 
 def calc_atr(df, period=14):
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift())
-    low_close = np.abs(df['low'] - df['close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    return true_range.rolling(window=period).mean()
-
-def calc_indicators(df):
-    """Calculates indicators needed for Institutional Breakout"""
+    import pandas as pd
+    return pd.Series(indicators.atr(df['high'], df['low'], df['close'], period), index=df.index)
+
+def calc_indicators(df, symbol=None, timeframe=None, range_window=RANGE_WINDOW):
+    """Calculates indicators needed for Institutional Breakout (memoized when symbol/timeframe are given)"""
+    cols = indicators.compute("breakout", df, symbol=symbol, timeframe=timeframe, range_window=range_window)
+
     # Volume Average (20 periods)
-    df['vol_avg_20'] = df['tick_volume'].rolling(window=20).mean()
-    df['volume_ratio'] = df['tick_volume'] / df['vol_avg_20']
+    df['vol_avg_20'] = cols['vol_avg_20']
+    df['volume_ratio'] = cols['volume_ratio']
     
     # ATR
-    df['ATR_14'] = calc_atr(df, 14)
+    df['ATR_14'] = cols['ATR_14']
     
     # 4-hour High/Low range
-    df['h4_high'] = df['high'].rolling(window=16).max()
-    df['h4_low'] = df['low'].rolling(window=16).min()
+    df['h4_high'] = cols['h4_high']
+    df['h4_low'] = cols['h4_low']
     
     return df
 
@@ -43,11 +45,56 @@ def is_ny_session(dt_utc):
     
     return start_time <= dt_ny.time() <= end_time
 
-def analyze_breakout(df):
+def ny_session_mask(index):
+    """Vectorized is_ny_session: boolean array for a UTC DatetimeIndex (one tz_convert pass, DST-aware)"""
+    import pandas as pd
+    idx = pd.DatetimeIndex(index)
+    idx = idx.tz_localize('UTC') if idx.tz is None else idx.tz_convert('UTC')
+    dt_ny = idx.tz_convert('America/New_York')
+
+    seconds = dt_ny.hour * 3600 + dt_ny.minute * 60 + dt_ny.second
+    exact = (dt_ny.microsecond == 0) & (dt_ny.nanosecond == 0)
+
+    # Same bounds as is_ny_session: 08:00 <= t <= 10:00 (10:00:00 itself is inside)
+    start = 8 * 3600
+    end = 10 * 3600
+    return np.asarray((seconds >= start) & ((seconds < end) | ((seconds == end) & exact)))
+
+def breakout_signal(close, h4_high, h4_low, volume_ratio, session, vol_threshold=VOLUME_RATIO_MIN):
+    """Array core of analyze_breakout: 1 / -1 where the close breaks the previous bar's range on high volume"""
+    close = np.asarray(close, dtype=float)
+    prev_high = np.empty_like(close)
+    prev_low = np.empty_like(close)
+    prev_high[:1] = prev_low[:1] = np.nan # Loop starts at 1 (needs the previous H4 range)
+    prev_high[1:] = np.asarray(h4_high, dtype=float)[:-1]
+    prev_low[1:] = np.asarray(h4_low, dtype=float)[:-1]
+
+    # NaN comparisons are False, same as the loop during indicator warm-up
+    with np.errstate(invalid='ignore'):
+        vol_ok = np.asarray(volume_ratio, dtype=float) > vol_threshold
+        long_mask = session & (close > prev_high) & vol_ok
+        short_mask = session & ~long_mask & (close < prev_low) & vol_ok
+
+    signal = np.zeros(len(close), dtype=np.int64) # 0: Neutral, 1: Long, -1: Short
+    signal[long_mask] = 1
+    signal[short_mask] = -1
+    return signal
+
+def analyze_breakout(df, legacy=False, vol_threshold=VOLUME_RATIO_MIN):
     """Institutional Breakout Logic: Rompimento com volume atípico"""
     # 1. Price breaks H4 high/low
     # 2. Volume is > 2x average
-    
+    if legacy:
+        return _analyze_breakout_loop(df, vol_threshold)
+
+    df['signal'] = breakout_signal(
+        df['close'].to_numpy(), df['h4_high'].to_numpy(), df['h4_low'].to_numpy(),
+        df['volume_ratio'].to_numpy(), ny_session_mask(df.index), vol_threshold
+    )
+    return df
+
+def _analyze_breakout_loop(df, vol_threshold=VOLUME_RATIO_MIN):
+    """Original per-bar implementation, kept for equivalence checks (analyze_breakout(df, legacy=True))"""
     df['signal'] = 0 # 0: Neutral, 1: Long, -1: Short
     
     for i in range(1, len(df)):
@@ -56,11 +103,128 @@ def analyze_breakout(df):
             continue
             
         # Long Breakout
-        if df['close'].iloc[i] > df['h4_high'].iloc[i-1] and df['volume_ratio'].iloc[i] > 1.3:
+        if df['close'].iloc[i] > df['h4_high'].iloc[i-1] and df['volume_ratio'].iloc[i] > vol_threshold:
             df.at[df.index[i], 'signal'] = 1
             
         # Short Breakout
-        elif df['close'].iloc[i] < df['h4_low'].iloc[i-1] and df['volume_ratio'].iloc[i] > 1.3:
+        elif df['close'].iloc[i] < df['h4_low'].iloc[i-1] and df['volume_ratio'].iloc[i] > vol_threshold:
             df.at[df.index[i], 'signal'] = -1
             
     return df
+
+class BreakoutState:
+    """Streaming version of calc_indicators + analyze_breakout for the live bridge.
+
+    Holds only the last few bars, so each new or revised bar costs O(window)
+    no matter how much history has been seen. Values match the batch functions.
+    """
+
+    def __init__(self, vol_window=20, atr_period=14, range_window=RANGE_WINDOW, vol_threshold=VOLUME_RATIO_MIN):
+        self.vol_window = vol_window
+        self.atr_period = atr_period
+        self.range_window = range_window
+        self.vol_threshold = vol_threshold
+        self.reset()
+
+    def reset(self):
+        size = max(self.vol_window, self.atr_period, self.range_window)
+        self.times = deque(maxlen=size)
+        self.closes = deque(maxlen=size)
+        self.highs = deque(maxlen=size)
+        self.lows = deque(maxlen=size)
+        self.volumes = deque(maxlen=size)
+        self.true_ranges = deque(maxlen=size)
+        self.ranges = deque(maxlen=2) # (h4_high, h4_low) of the last two bars
+        self.count = 0
+        self.last = None
+
+    @property
+    def last_time(self):
+        return self.times[-1] if self.times else None
+
+    @property
+    def prev_range(self):
+        """(h4_high, h4_low) of the bar before the last one: the levels the last bar's signal is checked against"""
+        return self.ranges[0] if len(self.ranges) == 2 else (np.nan, np.nan)
+
+    def update(self, rates):
+        """Feeds MT5 rates (oldest first). Older bars are skipped, the current one is revised, newer ones appended."""
+        for rate in rates:
+            t = int(rate['time'])
+            if self.times and t < self.times[-1]:
+                continue
+            self.update_bar(t, float(rate['high']), float(rate['low']), float(rate['close']), float(rate['tick_volume']))
+        return self.last
+
+    def update_bar(self, t, high, low, close, tick_volume):
+        if self.times and t == self.times[-1]:
+            # Forming bar revised: drop its old values and recompute
+            for buf in (self.times, self.closes, self.highs, self.lows, self.volumes, self.true_ranges, self.ranges):
+                buf.pop()
+            self.count -= 1
+
+        prev_close = self.closes[-1] if self.closes else None
+        if prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+        self.times.append(t)
+        self.closes.append(close)
+        self.highs.append(high)
+        self.lows.append(low)
+        self.volumes.append(tick_volume)
+        self.true_ranges.append(true_range)
+        self.count += 1
+
+        vol_avg = self._window_mean(self.volumes, self.vol_window)
+        atr = self._window_mean(self.true_ranges, self.atr_period)
+        if self.count >= self.range_window:
+            h4_high = max(list(self.highs)[-self.range_window:])
+            h4_low = min(list(self.lows)[-self.range_window:])
+        else:
+            h4_high = h4_low = np.nan
+        self.ranges.append((h4_high, h4_low))
+        vol_ratio = tick_volume / vol_avg if self.count >= self.vol_window else np.nan
+
+        self.last = {
+            "time": t,
+            "close": close,
+            "tick_volume": tick_volume,
+            "vol_avg_20": vol_avg,
+            "volume_ratio": vol_ratio,
+            "ATR_14": atr,
+            "h4_high": h4_high,
+            "h4_low": h4_low,
+            "signal": self._signal(t, close, vol_ratio),
+        }
+        return self.last
+
+    def volume_needed(self):
+        """Tick volume above which the last bar's volume ratio exceeds vol_threshold (inf during warm-up).
+
+        The 20-bar average includes the bar itself: v / ((S + v) / n) > k  <=>  v > k * S / (n - k).
+        """
+        n = self.vol_window
+        if self.count < n or n <= self.vol_threshold:
+            return np.inf
+        rest = sum(list(self.volumes)[-n:-1])
+        return self.vol_threshold * rest / (n - self.vol_threshold)
+
+    def _window_mean(self, buf, window):
+        if self.count < window:
+            return np.nan
+        return sum(list(buf)[-window:]) / window
+
+    def _signal(self, t, close, vol_ratio):
+        if len(self.ranges) < 2:
+            return 0
+        if not is_ny_session(datetime.fromtimestamp(t, tz=timezone.utc).replace(tzinfo=None)):
+            return 0
+
+        prev_high, prev_low = self.ranges[0]
+        if close > prev_high and vol_ratio > self.vol_threshold:
+            return 1
+        elif close < prev_low and vol_ratio > self.vol_threshold:
+            return -1
+        return 0
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+from data_provider import TICK_DTYPE
+
+# Seeded synthetic XAUUSD bars and ticks for benchmarks and offline runs.
+# Prices follow a random walk with clustered volatility (~15% annualized),
+# activity follows the Asia / London / New York session profile and the
+# market is closed from Friday 21:00 to Sunday 22:00 UTC.
+
+RATES_DTYPE = np.dtype([
+    ("time", np.int64), ("open", np.float64), ("high", np.float64), ("low", np.float64),
+    ("close", np.float64), ("tick_volume", np.uint64), ("spread", np.int32), ("real_volume", np.uint64),
+])
+
+TIMEFRAME_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "H1": 3600}
+
+ANNUAL_VOL = 0.15
+START_PRICE = 2000.0
+START_DATE = "2015-01-05"
+
+# Relative activity per UTC hour: quiet Asia, London open, London/NY overlap peak
+SESSION_PROFILE = np.array([
+    0.5, 0.5, 0.6, 0.6, 0.5, 0.5, 0.6, 1.2, 1.6, 1.5, 1.3, 1.2,
+    1.4, 2.2, 2.6, 2.3, 1.8, 1.3, 1.0, 0.9, 0.8, 0.6, 0.4, 0.4,
+])
+
+def trading_times(n, timeframe_str="M1", start=START_DATE):
+    """First n bar open times (epoch seconds) while the market is open"""
+    step = TIMEFRAME_SECONDS[timeframe_str]
+    start_ts = int(pd.Timestamp(start).timestamp())
+    out = []
+    total = 0
+    block = max(n * 2, 1024)
+    while total < n:
+        t = start_ts + np.arange(block, dtype=np.int64) * step
+        dow = (t // 86400 + 3) % 7 # 0 = Monday
+        hour = (t // 3600) % 24
+        closed = ((dow == 4) & (hour >= 21)) | (dow == 5) | ((dow == 6) & (hour < 22))
+        t = t[~closed]
+        out.append(t[:n - total])
+        total += len(out[-1])
+        start_ts += block * step
+    return np.concatenate(out)
+
+def _vol_regime(rng, n, persistence=0.999, vol_of_vol=0.4):
+    """Clustered volatility multiplier: exp of a stationary AR(1) with std vol_of_vol"""
+    shocks = rng.normal(0.0, vol_of_vol * np.sqrt(1 - persistence ** 2), n)
+    shocks[0] = rng.normal(0.0, vol_of_vol) * (1 - persistence) # Start from the stationary distribution
+    # x_t = p * x_(t-1) + e_t through the EWM recursion y_t = p * y_(t-1) + (1 - p) * e_t, x = y / (1 - p)
+    log_vol = pd.Series(shocks).ewm(alpha=1 - persistence, adjust=False).mean().to_numpy() / (1 - persistence)
+    return np.exp(log_vol - vol_of_vol ** 2 / 2)
+
+def generate_bars(n, timeframe_str="M1", seed=42, start=START_DATE):
+    """MT5-style rates array (same fields as copy_rates_*) with n bars"""
+    rng = np.random.default_rng(seed)
+    times = trading_times(n, timeframe_str, start)
+    step = TIMEFRAME_SECONDS[timeframe_str]
+
+    activity = SESSION_PROFILE[(times // 3600) % 24]
+    regime = _vol_regime(rng, n)
+    sigma = ANNUAL_VOL / np.sqrt(252 * 86400 / step) * np.sqrt(activity) * regime
+
+    log_ret = rng.normal(0.0, 1.0, n) * sigma
+    close = START_PRICE * np.exp(np.cumsum(log_ret))
+    open_ = np.empty(n)
+    open_[0] = START_PRICE
+    open_[1:] = close[:-1]
+
+    # Wicks beyond the open/close body, proportional to the bar's volatility
+    wick = np.abs(rng.normal(0.0, 0.6, (2, n))) * sigma * close
+    high = np.maximum(open_, close) + wick[0]
+    low = np.minimum(open_, close) - wick[1]
+
+    # Volume follows the session profile and the volatility regime, with occasional surges
+    surge = np.where(rng.random(n) < 0.01, rng.uniform(2.0, 4.0, n), 1.0)
+    volume = 40 * step / 60 * activity * regime * rng.lognormal(0.0, 0.35, n) * surge
+
+    rates = np.empty(n, dtype=RATES_DTYPE)
+    rates['time'] = times
+    rates['open'] = np.round(open_, 2)
+    rates['close'] = np.round(close, 2)
+    rates['high'] = np.round(np.maximum(high, np.maximum(open_, close)), 2)
+    rates['low'] = np.round(np.minimum(low, np.minimum(open_, close)), 2)
+    rates['tick_volume'] = np.maximum(1, volume).astype(np.uint64)
+    rates['spread'] = rng.integers(15, 40, n)
+    rates['real_volume'] = 0
+    return rates
+
+def bars_frame(rates):
+    """Time-indexed DataFrame like the backtester builds from MT5 rates"""
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df.set_index('time')
+
+def iter_ticks(days, seed=42, start=START_DATE, chunk_size=1_000_000, ticks_per_hour=18000):
+    """Yields TICK_DTYPE chunks covering `days` calendar days of trading"""
+    rng = np.random.default_rng(seed)
+    hours = trading_times(days * 24, "H1", start)
+    hours = hours[hours < int(pd.Timestamp(start).timestamp()) + days * 86400]
+    price = START_PRICE
+    buf = []
+    size = 0
+    for hour_start in hours:
+        activity = SESSION_PROFILE[(hour_start // 3600) % 24]
+        k = rng.poisson(ticks_per_hour * activity)
+        if k == 0:
+            continue
+        t = hour_start * 1000 + np.sort(rng.integers(0, 3_600_000, k))
+        sigma = ANNUAL_VOL / np.sqrt(252 * 24) * np.sqrt(activity) / np.sqrt(k)
+        mid = price * np.exp(np.cumsum(rng.normal(0.0, sigma, k)))
+        price = mid[-1]
+        spread = rng.choice([0.15, 0.2, 0.25, 0.3, 0.4], k)
+
+        ticks = np.empty(k, dtype=TICK_DTYPE)
+        ticks['time_msc'] = t
+        ticks['bid'] = np.round(mid - spread / 2, 2)
+        ticks['ask'] = ticks['bid'] + spread
+        buf.append(ticks)
+        size += k
+        if size >= chunk_size:
+            joined = np.concatenate(buf)
+            for i in range(0, len(joined) - chunk_size + 1, chunk_size):
+                yield joined[i:i + chunk_size]
+            rest = joined[len(joined) // chunk_size * chunk_size:]
+            buf, size = [rest], len(rest)
+    if size:
+        yield np.concatenate(buf)
@@ -0,0 +1,159 @@
+try:
+    import MetaTrader5 as mt5
+except ImportError:
+    mt5 = None
+import argparse
+import json
+import sys
+import numpy as np
+from datetime import datetime, timedelta
+from backtest_engine import _first_exit, format_result, DEFAULT_PARAMS, RISK_PER_TRADE, TRADE_DTYPE, EXIT_SL, EXIT_TP, OUTPUT_FORMATS
+from data_provider import TickProvider, CHUNK_TICKS
+from strategy_v2 import BreakoutState
+
+# Tick-replay backtest: bid bars are built from the ticks and fed to the
+# streaming breakout state; a signal enters on the first tick of the next bar
+# (BUY at ask, SELL at bid) and SL/TP/break-even are checked tick by tick on
+# the closing side of the quote, so the spread and the order of hits are real.
+# Ticks are processed in fixed-size chunks, keeping memory bounded.
+
+TIMEFRAME_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "H1": 3600}
+
+class TickReplay:
+    def __init__(self, timeframe_str="M15", params=None):
+        self.p = dict(DEFAULT_PARAMS, **(params or {}))
+        self.period_ms = TIMEFRAME_SECONDS[timeframe_str] * 1000
+        self.state = BreakoutState(range_window=int(self.p['range_window']), vol_threshold=self.p['vol_threshold'])
+        self.bar = None # [bar_id, high, low, close, ticks] of the forming bar
+        self.pending = 0 # Signal of the last closed bar, filled on the next tick
+        self.position = None
+        self.trades = []
+        self.event_times = [] # Entry/exit tick times (ms), indexed by the trades
+        self.ticks = 0
+
+    def _open(self, side, t, bid, ask):
+        entry = ask if side == 1 else bid
+        atr = self.state.last['ATR_14']
+        sl = entry - side * atr * self.p['sl_mult']
+        self.position = {
+            "side": side, "entry": entry, "entry_time": t,
+            "sl": sl, "original_sl": sl,
+            "tp": entry + side * atr * self.p['sl_mult'] * self.p['reward'],
+            "be_level": entry + side * atr * self.p['sl_mult'], # 1:1 Level
+            "be_triggered": False,
+        }
+
+    def _manage(self, times, bid, ask, start, end):
+        """Runs the open position over ticks[start:end], closing it on the first SL/TP touch"""
+        pos = self.position
+        px = (bid if pos['side'] == 1 else ask)[:end] # Closing side of the quote
+        while start < end:
+            be_level = None if pos['be_triggered'] else pos['be_level']
+            idx, event = _first_exit(px, px, start, pos['side'], pos['sl'], pos['tp'], be_level)
+            if event is None:
+                return
+            if event == 'be':
+                pos['be_triggered'] = True
+                pos['sl'] = pos['entry']
+                start = idx + 1
+                continue
+            self._close(times[idx], px[idx], EXIT_TP if event == 'tp' else EXIT_SL)
+            return
+
+    def _close(self, t, price, reason):
+        pos = self.position
+        risk = abs(pos['entry'] - pos['original_sl'])
+        profit = RISK_PER_TRADE * pos['side'] * (price - pos['entry']) / risk if risk > 0 else 0.0
+        k = len(self.event_times)
+        self.event_times.extend((pos['entry_time'], int(t)))
+        self.trades.append((
+            pos['side'], k, k + 1, pos['entry'], price, pos['sl'], pos['original_sl'], pos['tp'],
+            pos['be_triggered'] or reason == EXIT_TP, reason, profit
+        ))
+        self.position = None
+
+    def _close_bar(self):
+        bar_id, high, low, close, count = self.bar
+        row = self.state.update_bar(bar_id * self.period_ms // 1000, high, low, close, float(count))
+        if row['signal'] != 0 and self.position is None:
+            self.pending = int(row['signal'])
+
+    def feed(self, ticks):
+        """Processes one chunk of TICK_DTYPE ticks (time ordered)"""
+        n = len(ticks)
+        if n == 0:
+            return
+        self.ticks += n
+        times, bid, ask = ticks['time_msc'], ticks['bid'], ticks['ask']
+        bar_ids = times // self.period_ms
+
+        # Segments of ticks that belong to one bar
+        starts = np.flatnonzero(bar_ids[1:] != bar_ids[:-1]) + 1
+        edges = np.concatenate(([0], starts, [n]))
+
+        for a, b in zip(edges[:-1].tolist(), edges[1:].tolist()):
+            bar_id = int(bar_ids[a])
+            if self.bar is not None and self.bar[0] != bar_id:
+                self._close_bar()
+                self.bar = None
+
+            if self.pending:
+                self._open(self.pending, times[a], bid[a], ask[a])
+                self.pending = 0
+                if self.position is not None:
+                    self._manage(times, bid, ask, a + 1, b)
+            elif self.position is not None:
+                self._manage(times, bid, ask, a, b)
+
+            seg = bid[a:b]
+            if self.bar is None:
+                self.bar = [bar_id, float(seg.max()), float(seg.min()), float(seg[-1]), b - a]
+            else:
+                self.bar[1] = max(self.bar[1], float(seg.max()))
+                self.bar[2] = min(self.bar[2], float(seg.min()))
+                self.bar[3] = float(seg[-1])
+                self.bar[4] += b - a
+
+    def result_arrays(self):
+        """(trades, times) in the backtest_engine layout, for format_result/iter_ndjson"""
+        return np.array(self.trades, dtype=TRADE_DTYPE), np.array(self.event_times, dtype='datetime64[ms]')
+
+def run_tick_backtest(symbol, start_date_str, end_date_str, timeframe_str="M15", params=None,
+                      output="full", chunk_size=CHUNK_TICKS, provider=None):
+    start_dt = datetime.strptime(start_date_str, "%Y-%m-%d")
+    end_dt = datetime.strptime(end_date_str, "%Y-%m-%d") + timedelta(days=1)
+
+    online = False
+    if provider is None:
+        online = mt5 is not None and mt5.initialize()
+        provider = TickProvider(online=online)
+
+    replay = TickReplay(timeframe_str, params)
+    try:
+        for chunk in provider.iter_chunks(symbol, start_dt, end_dt, chunk_size):
+            replay.feed(chunk)
+    finally:
+        if online:
+            mt5.shutdown()
+
+    if replay.ticks == 0:
+        return {"error": "No tick data found for period"}
+
+    result = format_result(*replay.result_arrays(), output)
+    result["summary"]["ticks"] = replay.ticks
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tick-replay backtest of the breakout strategy")
+    parser.add_argument("symbol")
+    parser.add_argument("start")
+    parser.add_argument("end")
+    parser.add_argument("timeframe", nargs="?", default="M15", choices=sorted(TIMEFRAME_SECONDS))
+    parser.add_argument("--format", choices=[f for f in OUTPUT_FORMATS if f != "ndjson"], default="full")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_TICKS)
+    parser.add_argument("--params", help="JSON object overriding DEFAULT_PARAMS")
+    args = parser.parse_args()
+
+    params = json.loads(args.params) if args.params else None
+    res = run_tick_backtest(args.symbol, args.start, args.end, args.timeframe, params, args.format, args.chunk_size)
+    json.dump(res, sys.stdout, separators=(',', ':'))
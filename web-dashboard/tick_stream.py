@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import metrics
+
+# Server-Sent Events push stream run inside the bridge: every tick is encoded
+# once and fanned out to any number of browser subscribers, so MT5 can be
+# polled every 100-250 ms without one HTTP round trip per tick per client.
+#
+# Frames are compact deltas: short keys and only the fields that changed since
+# the previous frame of the same symbol ("t" and "s" are always present). The
+# ticks of one bridge cycle (one per tracked symbol) go out as a single write.
+# A new subscriber first receives a snapshot of every symbol with every field,
+# and so does a slow one whose queue overflows: its queued deltas are replaced
+# by the snapshot, which already contains every update they carried.
+#
+#   GET /stream  -> text/event-stream
+#   GET /health  -> {"status": "ok", "subscribers": n, "frames": n}
+#   GET /metrics -> bridge latency/counter snapshot (see metrics.py)
+
+logger = logging.getLogger(__name__)
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("BRIDGE_STREAM_PORT", 8766))
+SUBSCRIBER_BUFFER = 32 # Writes queued per slow client before its backlog is replaced by a snapshot
+HEARTBEAT_INTERVAL = 15.0 # seconds
+
+# Tick payload key -> frame key
+FRAME_KEYS = {
+    "timestamp": "t", "symbol": "s", "bid": "b", "ask": "a",
+    "equity": "e", "balance": "B", "profit": "p", "prediction": "P",
+}
+
+def _encode(frame):
+    return b"data: " + json.dumps(frame, separators=(',', ':')).encode() + b"\n\n"
+
+class TickStream:
+    """Thread-safe fan-out of delta-encoded tick frames to SSE subscribers"""
+
+    def __init__(self, host=HOST, port=PORT):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.state = {} # symbol -> latest value of every frame key (snapshot for new subscribers)
+        self.frames = 0
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.stream = self
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="tick-stream", daemon=True)
+        self.thread.start()
+        logger.info(f"Tick stream on http://{self.server.server_address[0]}:{self.server.server_address[1]}/stream")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def publish(self, payload):
+        self.publish_batch([payload])
+
+    def publish_batch(self, payloads):
+        """Pushes the fields of each tick payload that changed, all in one write; never blocks on slow clients"""
+        with self.lock:
+            frames = []
+            for payload in payloads:
+                symbol = payload.get("symbol")
+                state = self.state.setdefault(symbol, {})
+                delta = {}
+                for key, short in FRAME_KEYS.items():
+                    if key in payload and state.get(short) != payload[key]:
+                        delta[short] = payload[key]
+                if not delta:
+                    continue
+                delta["t"] = payload.get("timestamp", int(time.time() * 1000))
+                delta["s"] = symbol
+                state.update(delta)
+                frames.append(_encode(delta))
+            if not frames:
+                return
+            self.frames += len(frames)
+            data = b"".join(frames)
+            snapshot = None
+            for q in self.subscribers:
+                try:
+                    q.put_nowait(data)
+                except queue.Full: # Slow client: collapse its backlog into one full snapshot
+                    metrics.count("stream_resyncs")
+                    while True:
+                        try:
+                            q.get_nowait()
+                        except queue.Empty:
+                            break
+                    if snapshot is None:
+                        snapshot = self._snapshot()
+                    q.put_nowait(snapshot) # Only publishers (serialized by the lock) put
+
+    def _snapshot(self):
+        """Every field of every symbol as one write (caller holds the lock)"""
+        return b"".join(_encode(state) for state in self.state.values())
+
+    def subscribe(self):
+        q = queue.Queue(SUBSCRIBER_BUFFER)
+        with self.lock:
+            if self.state:
+                q.put_nowait(self._snapshot())
+            self.subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.subscribers.discard(q)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _cors(self):
+        # The dashboard page is served by Next.js on another port
+        self.send_header("Access-Control-Allow-Origin", "*")
+
+    def _json(self, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(200)
+        self._cors()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        stream = self.server.stream
+        if self.path == "/health":
+            with stream.lock:
+                health = {"status": "ok", "subscribers": len(stream.subscribers), "frames": stream.frames}
+            self._json(health)
+            return
+        if self.path == "/metrics":
+            self._json(metrics.snapshot())
+            return
+
+        if self.path.split("?")[0] != "/stream":
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self._cors()
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "keep-alive")
+        self.end_headers()
+
+        q = stream.subscribe()
+        try:
+            self.wfile.write(b"retry: 2000\n\n")
+            self.wfile.flush()
+            while True:
+                try:
+                    data = q.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    data = b": ping\n\n" # Keeps proxies open and detects closed clients
+                self.wfile.write(data)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            stream.unsubscribe(q)
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import shared_bars
+from backtest_engine import load_rates, simulate_trades, summarize, trades_to_records, DEFAULT_PARAMS
+from strategy_v2 import breakout_signal
+from indicators import breakout_columns
+
+# Walk-forward backtest: the range is cut into calendar chunks that run in
+# parallel, each with enough warm-up bars for the indicators. A trade still
+# open at a chunk boundary is handed to the next chunk, which then only takes
+# entries after that trade has closed, so the merged result equals a serial run.
+
+CHUNK_UNITS = {"D": "datetime64[D]", "W": "datetime64[W]", "M": "datetime64[M]", "Y": "datetime64[Y]"}
+
+def warmup_bars(params):
+    # Longest indicator window (volume avg 20, ATR 14, H4 range) + the previous bar the signal looks at
+    return max(20, 14, int(params['range_window'])) + 1
+
+# --- Worker side ---
+def _run_chunk(task):
+    start, stop, params = task
+    high, low, close, volume, session = shared_bars.bars()
+
+    w = max(0, start - warmup_bars(params))
+    cols = breakout_columns(
+        {"high": high[w:stop], "low": low[w:stop], "close": close[w:stop], "tick_volume": volume[w:stop]},
+        range_window=int(params['range_window'])
+    )
+    signal = breakout_signal(close[w:stop], cols['h4_high'], cols['h4_low'], cols['volume_ratio'], session[w:stop], params['vol_threshold'])
+
+    # Entries only inside the chunk, exits may run past it (prices are shared to the end)
+    trades, open_idx = simulate_trades(
+        high[w:], low[w:], close[w:], cols['ATR_14'], signal,
+        sl_mult=params['sl_mult'], tp_mult=params['sl_mult'] * params['reward'],
+        intrabar=params.get('intrabar', True), start=start - w, return_open=True
+    )
+    trades['entry_idx'] += w
+    trades['exit_idx'] += w
+
+    # Sparse signals so the parent can re-run the chunk after a handed-over trade
+    entries = np.flatnonzero(signal[start - w:]) + (start - w)
+    return {
+        "trades": trades,
+        "open_idx": open_idx + w if open_idx >= 0 else -1,
+        "entries": entries + w,
+        "sides": signal[entries],
+        "atr": cols['ATR_14'][entries],
+    }
+
+# --- Parent side ---
+def chunk_bounds(times, unit="M"):
+    """[start, stop) bar indices of each calendar chunk"""
+    periods = np.asarray(times).astype(CHUNK_UNITS[unit])
+    cuts = np.flatnonzero(periods[1:] != periods[:-1]) + 1
+    edges = np.concatenate(([0], cuts, [len(periods)]))
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+def _rerun_after(chunk, carry_exit, high, low, close, params):
+    """Re-simulates a chunk's entries that come after a handed-over trade closes"""
+    n = len(close)
+    signal = np.zeros(n, dtype=np.int8)
+    atr = np.full(n, np.nan)
+    keep = chunk['entries'] >= carry_exit
+    signal[chunk['entries'][keep]] = chunk['sides'][keep]
+    atr[chunk['entries'][keep]] = chunk['atr'][keep]
+    return simulate_trades(
+        high, low, close, atr, signal,
+        sl_mult=params['sl_mult'], tp_mult=params['sl_mult'] * params['reward'],
+        intrabar=params.get('intrabar', True), start=carry_exit, return_open=True
+    )
+
+def walk_forward_df(df, unit="M", workers=None, params=None):
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    times = df.index.values
+    bounds = chunk_bounds(times, unit)
+    workers = workers or os.cpu_count() or 1
+
+    with shared_bars.share(df) as initargs:
+        with ProcessPoolExecutor(max_workers=workers, initializer=shared_bars.attach, initargs=initargs) as pool:
+            chunks = list(pool.map(_run_chunk, [(a, b, p) for a, b in bounds]))
+
+    high, low, close = (df[c].to_numpy(dtype=np.float64) for c in ("high", "low", "close"))
+
+    # Stitch chunks in order, handing open positions across boundaries
+    windows, merged = [], []
+    carry_exit = 0 # Bar where the position from earlier chunks closes
+    for (a, b), chunk in zip(bounds, chunks):
+        trades, open_idx = chunk['trades'], chunk['open_idx']
+        first_entry = trades['entry_idx'][0] if len(trades) else open_idx
+        if carry_exit > a and 0 <= first_entry < carry_exit:
+            trades, open_idx = _rerun_after(chunk, carry_exit, high, low, close, p)
+        if len(trades):
+            carry_exit = max(carry_exit, int(trades['exit_idx'][-1]))
+        if open_idx >= 0:
+            carry_exit = len(close) # Open until the data ends: nothing after it can enter
+
+        merged.append(trades)
+        windows.append({
+            "start": str(np.datetime_as_string(times[a], unit='m')).replace('T', ' '),
+            "end": str(np.datetime_as_string(times[b - 1], unit='m')).replace('T', ' '),
+            "bars": b - a,
+            **summarize(trades, times, daily=False)
+        })
+
+    trades = np.concatenate(merged)
+    return {
+        "summary": summarize(trades, times),
+        "windows": windows,
+        "trades": trades_to_records(trades, times)
+    }
+
+def run_walk_forward(symbol, start_date_str, end_date_str, timeframe_str="M15", unit="M", workers=None, params=None):
+    df, _, error = load_rates(symbol, start_date_str, end_date_str, timeframe_str)
+    if error:
+        return {"error": error}
+    return walk_forward_df(df, unit=unit, workers=workers, params=params)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel walk-forward backtest over calendar chunks")
+    parser.add_argument("symbol")
+    parser.add_argument("start")
+    parser.add_argument("end")
+    parser.add_argument("timeframe", nargs="?", default="M15")
+    parser.add_argument("--chunk", choices=sorted(CHUNK_UNITS), default="M")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--params", help="JSON object overriding DEFAULT_PARAMS")
+    args = parser.parse_args()
+
+    params = json.loads(args.params) if args.params else None
+    res = run_walk_forward(args.symbol, args.start, args.end, args.timeframe, args.chunk, args.workers, params)
+    json.dump(res, sys.stdout, indent=2)